@@ -53,7 +53,7 @@ Verifying background server..."
 
     echo "
 Verifying data backups..."
-    MANUAL_BACKUP_COUNT=$(find "$BASE_DIR/manual_backups" -maxdepth 1 -name "superman_v2_manual_backup_*.tar.gz" -type f 2>/dev/null | wc -l)
+    MANUAL_BACKUP_COUNT=$(find "$BASE_DIR/manual_backups" -maxdepth 1 \( -name "superman_v2_manual_backup_*.tar.gz" -o -name "superman_v2_manual_backup_*.tar.zst" \) -type f 2>/dev/null | wc -l)
     echo -e "${C_GREEN}  -> Found $MANUAL_BACKUP_COUNT manual backups.${C_RESET}"
 }
 
@@ -693,7 +693,7 @@ show_backup_restore_menu() {
                 ;;
             2)
                 # List available backups
-                BACKUPS=$(find "$BASE_DIR/manual_backups" -maxdepth 1 -name "superman_v2_manual_backup_*.tar.gz" -type f 2>/dev/null | sort -r)
+                BACKUPS=$(find "$BASE_DIR/manual_backups" -maxdepth 1 \( -name "superman_v2_manual_backup_*.tar.gz" -o -name "superman_v2_manual_backup_*.tar.zst" \) -type f 2>/dev/null | sort -r)
                 if [ -z "$BACKUPS" ]; then
                     echo -e "${C_YELLOW}No manual backups found.${C_RESET}"
                     read -p "Press [Enter] to return..."
@@ -872,12 +872,12 @@ show_resource_impact() {
     echo ""
     echo -e "${C_CYAN}Backup Information:${C_RESET}"
     if [ -d "$BASE_DIR/manual_backups" ]; then
-        BACKUP_COUNT=$(find "$BASE_DIR/manual_backups" -name "*.tar.gz" 2>/dev/null | wc -l)
+        BACKUP_COUNT=$(find "$BASE_DIR/manual_backups" \( -name "*.tar.gz" -o -name "*.tar.zst" \) 2>/dev/null | wc -l)
         echo "  Manual backups: $BACKUP_COUNT"
         
         if [ "$BACKUP_COUNT" -gt 0 ]; then
             echo "  Backup details:"
-            find "$BASE_DIR/manual_backups" -name "*.tar.gz" 2>/dev/null | head -5 | while read backup; do
+            find "$BASE_DIR/manual_backups" \( -name "*.tar.gz" -o -name "*.tar.zst" \) 2>/dev/null | head -5 | while read backup; do
                 BACKUP_SIZE=$(du -sh "$backup" 2>/dev/null | cut -f1)
                 BACKUP_DATE=$(stat -c %y "$backup" 2>/dev/null | cut -d' ' -f1 || echo "Unknown")
                 echo "    $(basename "$backup"): $BACKUP_SIZE (Created: $BACKUP_DATE)"
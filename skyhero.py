@@ -18,6 +18,7 @@ This file now serves as a coordinator that imports and initializes the modular c
 
 import os
 import sys
+import logging
 from datetime import datetime, timedelta
 
 # Import modular components
@@ -25,6 +26,9 @@ from system.config import Config
 from system.database import init_db, sync_data_from_router
 from system.cli import main
 
+# Status messages from the system modules go to the console as plain lines
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
 # Ensure directories exist
 Config.ensure_dirs()
 
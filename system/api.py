@@ -1,92 +1,141 @@
 import os
+import stat
+import logging
 import re
 import json
-import hashlib
 import subprocess
+import tempfile
 import time
+import threading
+import queue
+import uuid
+from collections import OrderedDict
 from datetime import datetime
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, abort, jsonify, request, send_file, send_from_directory
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.security import safe_join
+from werkzeug.wsgi import FileWrapper
 from .config import Config
 from .reports import get_device_apps, build_period_report
+from .utils import hash_password, verify_password
+
+try:
+    # Optional: much faster encoder, not installed by install.sh
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 # =============================================================================
 # Section 4: Web Server (Flask API)
 # =============================================================================
 
-app = Flask(__name__)
+# www/ is served by Flask's built-in static handler at the site root, so a
+# reverse proxy can take over the whole static tree with a single location block.
+app = Flask(__name__, static_folder=Config.WWW_DIR, static_url_path='')
+app.config['USE_X_SENDFILE'] = Config.USE_X_SENDFILE
+
+class _FastJSONProvider(DefaultJSONProvider):
+    """jsonify() via orjson when available; otherwise stdlib json without key sorting."""
+    sort_keys = False
+
+    # response() always passes separators=(",", ":"), or indent=2 in debug mode.
+    # orjson's output is already compact, so only indented output needs stdlib json.
+    _ORJSON_KWARGS = frozenset(('separators',))
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and kwargs.keys() <= self._ORJSON_KWARGS:
+            try:
+                # Dates still go through Flask's default() so they keep its HTTP-date format
+                return orjson.dumps(obj, default=self.default,
+                                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME).decode()
+            except TypeError:
+                pass # Types orjson can't handle fall back to the stdlib encoder
+        return super().dumps(obj, **kwargs)
+
+app.json = _FastJSONProvider(app)
+
+# send_file streams through environ['wsgi.file_wrapper'] in 8 KiB reads. Servers
+# with a native wrapper (sendfile) keep theirs; otherwise read 64 KiB at a time.
+STATIC_CHUNK_SIZE = 64 * 1024
+
+def _large_chunk_file_wrapper(wsgi_app):
+    def file_wrapper(file, buffer_size=STATIC_CHUNK_SIZE):
+        return FileWrapper(file, max(buffer_size, STATIC_CHUNK_SIZE))
+
+    def middleware(environ, start_response):
+        environ.setdefault('wsgi.file_wrapper', file_wrapper)
+        return wsgi_app(environ, start_response)
+    return middleware
+
+app.wsgi_app = _large_chunk_file_wrapper(app.wsgi_app)
+
+# Vendored libraries and images only change on reinstall, so browsers may keep
+# them for a year without revalidating. App js/css keep Flask's default
+# no-cache + ETag so edits show up on the next page load.
+_IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+@app.after_request
+def set_static_cache_headers(response):
+    if request.endpoint == 'static' and response.status_code in (200, 304):
+        filename = (request.view_args or {}).get('filename', '')
+        if filename.startswith('third-party/') or filename.endswith('.png'):
+            response.headers['Cache-Control'] = _IMMUTABLE_CACHE_CONTROL
+    return response
 
 @app.route('/')
 def index():
     return send_from_directory(Config.WWW_DIR, 'index.html')
 
-@app.route('/script.js')
-def serve_script_js():
-    return send_from_directory(Config.WWW_DIR, 'script.js')
-
-@app.route('/style.css')
-def serve_style_css():
-    return send_from_directory(Config.WWW_DIR, 'style.css')
-
-@app.route('/chart.js')
-def serve_chart_js():
-    return send_from_directory(Config.WWW_DIR, 'chart.js')
-
-@app.route('/css/<path:filename>')
-def serve_css(filename):
-    return send_from_directory(os.path.join(Config.WWW_DIR, 'css'), filename)
-
-@app.route('/js/<path:filename>')
-def serve_js(filename):
-    return send_from_directory(os.path.join(Config.WWW_DIR, 'js'), filename)
-
-@app.route('/third-party/<path:filename>')
-def serve_third_party(filename):
-    return send_from_directory(os.path.join(Config.WWW_DIR, 'third-party'), filename)
-
-@app.route('/css/notifications.css')
-def serve_notifications_css():
-    return send_from_directory(os.path.join(Config.WWW_DIR, 'css'), 'notifications.css')
-
-@app.route('/js/notifications.js')
-def serve_notifications_js():
-    return send_from_directory(os.path.join(Config.WWW_DIR, 'js'), 'notifications.js')
-
-@app.route('/skyhero-icon.png')
-def serve_superman_icon():
-    return send_from_directory(Config.WWW_DIR, 'skyhero-icon.png')
-
-@app.route('/palestine_kid.png')
-def serve_palestine_kid():
-    return send_from_directory(Config.WWW_DIR, 'palestine_kid.png')
-
-@app.route('/palestine_flag.png')
-def serve_palestine_flag():
-    return send_from_directory(Config.WWW_DIR, 'palestine_flag.png')
-
 @app.route('/debug')
 def debug_route():
     return "Flask debug route is working!"
 
+def _send_data_file(directory, filename):
+    """Serves a generated JSON/data file via send_file (file_wrapper/X-Sendfile, Last-Modified, 304s)."""
+    # Never expose dotfiles such as .password from the data directory
+    if filename.startswith('.'):
+        abort(404)
+    path = safe_join(directory, filename)
+    try:
+        st = os.stat(path) if path else None
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        abort(404)
+    # Cheap validator from stat alone (no checksum); clients keep the body and
+    # revalidate with If-None-Match, getting a bodyless 304 while it is unchanged
+    etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    return send_file(path, conditional=True, etag=etag)
+
 @app.route('/data/period_data/<filename>')
 def get_period_data(filename):
-    print(f"Attempting to serve period data from: {os.path.join(Config.PERIOD_DIR, filename)}")
-    return send_from_directory(Config.PERIOD_DIR, filename)
+    logger.debug("Serving period data %s from %s", filename, Config.PERIOD_DIR)
+    return _send_data_file(Config.PERIOD_DIR, filename)
 
 @app.route('/data/daily_json/<filename>')
 def get_daily_json(filename):
-    print(f"Attempting to serve daily JSON from: {os.path.join(Config.DAILY_DIR, filename)}")
-    return send_from_directory(Config.DAILY_DIR, filename)
+    logger.debug("Serving daily JSON %s from %s", filename, Config.DAILY_DIR)
+    return _send_data_file(Config.DAILY_DIR, filename)
 
 @app.route('/data/<filename>')
 def get_data_file(filename):
-    print(f"Attempting to serve data file from: {os.path.join(Config.DATA_DIR, filename)}")
-    return send_from_directory(Config.DATA_DIR, filename)
+    logger.debug("Serving data file %s from %s", filename, Config.DATA_DIR)
+    return _send_data_file(Config.DATA_DIR, filename)
+
+# Month list, rescanned only when PERIOD_DIR gains or loses an entry
+_MONTHS_CACHE = {'mtime': None, 'data': None}
 
 @app.route('/get_available_months')
 def get_available_months():
-    files = [f for f in os.listdir(Config.PERIOD_DIR) if f.startswith('traffic_month_')]
-    months = sorted(list(set([f.split('_')[2].replace('.json', '') for f in files])), reverse=True)
-    return jsonify(months)
+    mtime = os.stat(Config.PERIOD_DIR).st_mtime_ns
+    if mtime != _MONTHS_CACHE['mtime']:
+        with os.scandir(Config.PERIOD_DIR) as it:
+            months = {e.name[14:-5] for e in it if e.name.startswith('traffic_month_') and e.name.endswith('.json')}
+        _MONTHS_CACHE['data'] = sorted(months, reverse=True)
+        _MONTHS_CACHE['mtime'] = mtime
+    return jsonify(_MONTHS_CACHE['data'])
 
 @app.route('/get_device_apps')
 def get_device_apps_api():
@@ -97,36 +146,141 @@ def get_device_apps_api():
         return jsonify({"error": "Missing required parameters"}), 400
     return jsonify(get_device_apps(mac, start, end))
 
+# Period reports are built by a single background worker so the request thread
+# returns immediately; the frontend polls /job_status/<id> for completion.
+_REPORT_QUEUE = queue.Queue()
+_REPORT_JOBS = OrderedDict() # job_id -> {"status", "start", "end"}
+_REPORT_PENDING = {} # (start, end) -> job_id still queued or running
+_REPORT_LOCK = threading.Lock()
+_REPORT_WORKER = None
+_MAX_REPORT_JOBS = 100
+
+def _set_report_status(job_id, status):
+    with _REPORT_LOCK:
+        job = _REPORT_JOBS.get(job_id)
+        if job: # May have been evicted from the job history
+            job["status"] = status
+
+def _report_worker():
+    while True:
+        job_id, start, end = _REPORT_QUEUE.get()
+        _set_report_status(job_id, "running")
+        try:
+            status = "done" if build_period_report(start, end) else "failed"
+        except Exception as e:
+            logger.error("Report %s-%s failed: %s", start, end, e)
+            status = "failed"
+        _set_report_status(job_id, status)
+        with _REPORT_LOCK:
+            _REPORT_PENDING.pop((start, end), None)
+        _REPORT_QUEUE.task_done()
+
+def _queue_period_report(start, end):
+    """Queues a report build and returns its job id, reusing an identical pending job."""
+    global _REPORT_WORKER
+    with _REPORT_LOCK:
+        job_id = _REPORT_PENDING.get((start, end))
+        if job_id:
+            return job_id
+
+        job_id = uuid.uuid4().hex
+        _REPORT_JOBS[job_id] = {"status": "queued", "start": start, "end": end}
+        _REPORT_PENDING[(start, end)] = job_id
+        while len(_REPORT_JOBS) > _MAX_REPORT_JOBS:
+            _REPORT_JOBS.popitem(last=False)
+
+        if _REPORT_WORKER is None or not _REPORT_WORKER.is_alive():
+            _REPORT_WORKER = threading.Thread(target=_report_worker, name="report-worker", daemon=True)
+            _REPORT_WORKER.start()
+
+    _REPORT_QUEUE.put((job_id, start, end))
+    return job_id
+
 @app.route('/request_generator')
 def request_generator():
     start = request.args.get('start')
     end = request.args.get('end')
     if not all([start, end]):
         return jsonify({"error": "Missing required parameters"}), 400
-    # In this new architecture, we can generate the report directly
-    # instead of creating a .req file.
-    report = build_period_report(start, end)
-    if report:
-        return jsonify({"success": True, "message": "Report generated."})
-    else:
-        return jsonify({"success": False, "message": "Failed to generate report."}), 500
+    job_id = _queue_period_report(start, end)
+    return jsonify({"success": True, "job_id": job_id, "message": "Report queued."})
+
+@app.route('/job_status/<job_id>')
+def job_status(job_id):
+    with _REPORT_LOCK:
+        job = _REPORT_JOBS.get(job_id)
+        job = dict(job) if job else None
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({"job_id": job_id, **job})
+
+# Password on/off is toggled from the CLI (another process), so the flag can't be
+# fixed at startup; re-check it at most once per AUTH_STATUS_TTL seconds.
+AUTH_STATUS_TTL = 5
+_AUTH_STATUS = {'checked': None, 'enabled': False}
 
 @app.route('/auth_status')
 def auth_status():
-    return jsonify({"enabled": os.path.exists(Config.PASSWORD_FILE)})
+    now = time.monotonic()
+    if _AUTH_STATUS['checked'] is None or now - _AUTH_STATUS['checked'] >= AUTH_STATUS_TTL:
+        _AUTH_STATUS['enabled'] = os.path.exists(Config.PASSWORD_FILE)
+        _AUTH_STATUS['checked'] = now
+    return jsonify({"enabled": _AUTH_STATUS['enabled']})
+
+# Stored password hash, re-read only when PASSWORD_FILE changes on disk
+_PW_CACHE = {'stamp': None, 'hash': None}
+
+def _load_password_hash():
+    """Returns the stored password hash, or None if no password is set."""
+    try:
+        st = os.stat(Config.PASSWORD_FILE)
+    except FileNotFoundError:
+        _PW_CACHE['stamp'] = None
+        _PW_CACHE['hash'] = None
+        return None
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    if stamp != _PW_CACHE['stamp']:
+        with open(Config.PASSWORD_FILE, 'r') as f:
+            _PW_CACHE['hash'] = f.read().strip()
+        _PW_CACHE['stamp'] = stamp
+    return _PW_CACHE['hash']
+
+def _replace_password_file(new_hash):
+    """
+    Atomically replaces PASSWORD_FILE, so a power cut or a concurrent login never
+    sees it truncated (an empty hash would reject every password).
+    """
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(Config.PASSWORD_FILE), prefix='.password.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(new_hash)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, Config.PASSWORD_FILE)
+    except OSError:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
 
 @app.route('/auth_check', methods=['POST'])
 def auth_check():
     password_attempt = request.get_data(as_text=True)
-    if not os.path.exists(Config.PASSWORD_FILE):
+    stored_hash = _load_password_hash()
+    if stored_hash is None:
         return jsonify({"success": True}) # No password set
 
-    with open(Config.PASSWORD_FILE, 'r') as f:
-        stored_hash = f.read().strip()
-    
-    attempted_hash = hashlib.sha256(password_attempt.encode()).hexdigest()
+    matches, needs_rehash = verify_password(password_attempt, stored_hash)
 
-    if attempted_hash == stored_hash:
+    if matches:
+        if needs_rehash:
+            # One-time upgrade of a legacy SHA-256 hash to salted PBKDF2
+            try:
+                _replace_password_file(hash_password(password_attempt))
+            except OSError as e:
+                logger.warning("Could not upgrade the stored password hash: %s", e)
         return jsonify({"success": True})
     else:
         return jsonify({"success": False, "error": "Incorrect password"})
@@ -151,7 +305,7 @@ def db_restore_status():
                             "backup_file": parts[2]
                         })
         except Exception as e:
-            print(f"Error reading last_restore.txt: {e}")
+            logger.error("Error reading last_restore.txt: %s", e)
     
     return jsonify({"restored": False})
 
@@ -165,7 +319,7 @@ def clear_db_restore_status():
             os.remove(last_restore_file)
             return jsonify({"success": True, "message": "Restore status cleared."})
         except Exception as e:
-            print(f"Error removing last_restore.txt: {e}")
+            logger.error("Error removing last_restore.txt: %s", e)
             return jsonify({"success": False, "error": str(e)}), 500
     
     return jsonify({"success": True, "message": "No restore status to clear."})
@@ -179,6 +333,41 @@ def serve_db_restore_history():
     else:
         return "Log file not found", 404
 
+# saved_groups.json, kept in memory and re-read only when the file changes on disk.
+# The lock serializes read-modify-write so concurrent POSTs don't drop updates.
+_GROUPS = {'stamp': None, 'data': None, 'lock': threading.Lock()}
+
+def _groups_file():
+    return os.path.join(Config.DATA_DIR, "saved_groups.json")
+
+def _load_groups_locked():
+    """Returns the cached groups dict, refreshing it if the file changed. Caller holds the lock."""
+    groups_file = _groups_file()
+    try:
+        st = os.stat(groups_file)
+    except FileNotFoundError:
+        _GROUPS['stamp'] = None
+        _GROUPS['data'] = {"groups": []}
+        return _GROUPS['data']
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    if stamp != _GROUPS['stamp'] or _GROUPS['data'] is None:
+        with open(groups_file, 'r') as f:
+            _GROUPS['data'] = json.load(f)
+        _GROUPS['stamp'] = stamp
+    return _GROUPS['data']
+
+def _save_groups_locked(groups_data):
+    """Atomically replaces saved_groups.json and updates the cache. Caller holds the lock."""
+    groups_file = _groups_file()
+    tmp_file = f"{groups_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(groups_data, f)
+    os.replace(tmp_file, groups_file)
+    st = os.stat(groups_file)
+    _GROUPS['stamp'] = (st.st_mtime_ns, st.st_size)
+    _GROUPS['data'] = groups_data
+
 @app.route('/save_group', methods=['POST'])
 def save_group():
     """Save or update a group in saved_groups.json."""
@@ -188,29 +377,20 @@ def save_group():
 
     name = data['name']
     devices = data['devices']
-    groups_file = os.path.join(Config.DATA_DIR, "saved_groups.json")
 
     try:
-        # Load existing groups
-        if os.path.exists(groups_file):
-            with open(groups_file, 'r') as f:
-                groups_data = json.load(f)
-        else:
-            groups_data = {"groups": []}
-
-        # Find existing group or add new
-        group_found = False
-        for group in groups_data["groups"]:
-            if group["name"] == name:
-                group["devices"] = devices
-                group_found = True
-                break
-        if not group_found:
-            groups_data["groups"].append({"name": name, "devices": devices})
+        with _GROUPS['lock']:
+            groups = list(_load_groups_locked()["groups"])
+
+            # Replace existing group or add new
+            for i, group in enumerate(groups):
+                if group["name"] == name:
+                    groups[i] = {**group, "devices": devices}
+                    break
+            else:
+                groups.append({"name": name, "devices": devices})
 
-        # Save back
-        with open(groups_file, 'w') as f:
-            json.dump(groups_data, f)
+            _save_groups_locked({"groups": groups})
 
         return jsonify({"success": True})
     except Exception as e:
@@ -219,13 +399,9 @@ def save_group():
 @app.route('/load_groups')
 def load_groups():
     """Load all groups from saved_groups.json."""
-    groups_file = os.path.join(Config.DATA_DIR, "saved_groups.json")
-    if not os.path.exists(groups_file):
-        return jsonify({"groups": []})
-
     try:
-        with open(groups_file, 'r') as f:
-            groups_data = json.load(f)
+        with _GROUPS['lock']:
+            groups_data = _load_groups_locked()
         return jsonify(groups_data)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -238,15 +414,12 @@ def delete_group():
         return jsonify({"success": False, "error": "Missing name"}), 400
 
     name = data['name']
-    groups_file = os.path.join(Config.DATA_DIR, "saved_groups.json")
 
     try:
-        if os.path.exists(groups_file):
-            with open(groups_file, 'r') as f:
-                groups_data = json.load(f)
-            groups_data["groups"] = [g for g in groups_data["groups"] if g["name"] != name]
-            with open(groups_file, 'w') as f:
-                json.dump(groups_data, f)
+        with _GROUPS['lock']:
+            if os.path.exists(_groups_file()):
+                groups = _load_groups_locked()["groups"]
+                _save_groups_locked({"groups": [g for g in groups if g["name"] != name]})
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -356,7 +529,7 @@ def save_notification_rule():
             from system.notify import reset_dedup_for_rule
             reset_dedup_for_rule(rule_id)
         except Exception as e:
-            print(f"[api] Warning: could not reset dedup state for rule {rule_id}: {e}")
+            logger.warning("Could not reset dedup state for rule %s: %s", rule_id, e)
     else:
         # Create new
         data['id'] = get_next_rule_id()
@@ -650,7 +823,7 @@ def get_top_apps():
             "has_data": len(all_items) > 0
         })
     except Exception as e:
-        print(f"[get_top_apps] Error: {e}")
+        logger.error("[get_top_apps] Error: %s", e)
         import traceback
         traceback.print_exc()
         return jsonify({"items": [], "has_data": False, "error": str(e)})
@@ -1,18 +1,27 @@
 import os
 import sys
+import errno
 import json
 import hashlib
+import sqlite3
 import subprocess
+import time
 from datetime import datetime, timedelta
 from .config import Config
 from .reports import create_daily_rollup, run_traffic_monitor, create_monthly_reports
 from .database import ensure_healthy_database, import_history_from_router, sync_data_from_router
-from .api import app
+from .utils import hash_password
 
 # =============================================================================
 # Section 5: CLI Command Handler
 # =============================================================================
 
+# gzip level for backups: level 1 is several times faster than the default 9
+# and only a few percent larger on SQLite pages and JSON
+BACKUP_GZIP_LEVEL = 1
+# Read/write size when streaming backups; fewer syscalls than the 64 KiB default
+BACKUP_COPY_BUFSIZE = 2 * 1024 * 1024
+
 def set_password():
     """Handles setting/changing the password via CLI."""
     try:
@@ -26,7 +35,7 @@ def set_password():
             print("Password cannot be empty. Aborting.")
             return
 
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        hashed_password = hash_password(password)
         with open(Config.PASSWORD_FILE, 'w') as f:
             f.write(hashed_password)
         print("Password updated successfully.")
@@ -41,6 +50,73 @@ def disable_password():
     else:
         print("No password was set.")
 
+class _HashingReader:
+    """File wrapper that feeds everything read through it into a SHA-256."""
+
+    def __init__(self, f):
+        self.f = f
+        self.h = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.h.update(data)
+        return data
+
+    def hexdigest(self):
+        return self.h.hexdigest()
+
+def _copy_file_in_kernel(src, dst):
+    """
+    Copies src to dst with copy_file_range(2) so data never passes through userspace.
+    Falls back to shutil.copy2 (sendfile-based on Linux) if the kernel or filesystem
+    pair doesn't support it.
+    """
+    import shutil
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as f_src, open(dst, 'wb') as f_dst:
+                remaining = os.fstat(f_src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(f_src.fileno(), f_dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(src, dst)
+                return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+def _snapshot_database(src, dst):
+    """Copies the SQLite database at src into a fresh file at dst using the online backup API."""
+    if os.path.exists(dst):
+        os.remove(dst)
+    from urllib.parse import quote
+    src_conn = sqlite3.connect(f"file:{quote(os.path.abspath(src))}?mode=ro", uri=True)
+    try:
+        dst_conn = sqlite3.connect(dst)
+        try:
+            src_conn.backup(dst_conn)
+        finally:
+            dst_conn.close()
+    finally:
+        src_conn.close()
+
+def _prune_old_backups(backup_dir, max_age_days):
+    """
+    Deletes TrafficAnalyzer_*.db.gz backups and their .sha256 files whose mtime is
+    more than max_age_days whole days old (same rule as `find -mtime +N`), in one pass.
+    """
+    cutoff = time.time() - (max_age_days + 1) * 86400
+    with os.scandir(backup_dir) as it:
+        for entry in it:
+            name = entry.name
+            if not name.startswith('TrafficAnalyzer_') or not (name.endswith('.db.gz') or name.endswith('.db.gz.sha256')):
+                continue
+            if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime <= cutoff:
+                os.remove(entry.path)
+
 def create_database_backup():
     """
     Creates a compressed daily backup of the traffic.db database.
@@ -50,13 +126,12 @@ def create_database_backup():
         import subprocess
         import gzip
         import shutil
-        from datetime import datetime
         
         # Ensure our final backup destination exists
         os.makedirs(Config.DB_BACKUPS_DIR, exist_ok=True)
         
         # Define file names and paths
-        date_tag = datetime.now().strftime('%F_%H')
+        date_tag = time.strftime('%Y-%m-%d_%H')
         # Backup the local traffic.db file, not the live database
         db_source_path = Config.LOCAL_DB_PATH
         final_backup_path = os.path.join(Config.DB_BACKUPS_DIR, f"TrafficAnalyzer_{date_tag}.db.gz")
@@ -67,29 +142,45 @@ def create_database_backup():
             print(f"Local traffic.db not found at {db_source_path}. Skipping backup.")
             return
             
-        # 1. Copy the traffic.db to a temporary location before compression
+        # 1. Snapshot the traffic.db to a temporary location before compression.
+        # SQLite's online backup API gives a consistent copy even if the monitor
+        # is writing at the same moment; a raw file copy is the fallback.
         print("Copying the database for backup...")
         temp_db_path = f"/tmp/superman_backup_db_{os.getpid()}"
-        shutil.copy2(db_source_path, temp_db_path)
+        try:
+            _snapshot_database(db_source_path, temp_db_path)
+        except sqlite3.Error as e:
+            print(f"SQLite backup failed ({e}), copying the file instead...")
+            _copy_file_in_kernel(db_source_path, temp_db_path)
         
-        # 2. Compress the database
+        # 2. Compress the database (pigz spreads DEFLATE over all cores; same .gz output).
+        # The uncompressed snapshot is hashed as it is fed to the compressor, so the
+        # checksum covers the database itself and no second read is needed.
         print("Compressing the database...")
-        with open(temp_db_path, 'rb') as f_in:
-            with gzip.open(final_backup_path, 'wb') as f_out:
-                shutil.copyfileobj(f_in, f_out)
+        pigz_path = shutil.which('pigz')
+        with open(temp_db_path, 'rb') as f_raw:
+            f_in = _HashingReader(f_raw)
+            if pigz_path:
+                with open(final_backup_path, 'wb') as f_out:
+                    proc = subprocess.Popen([pigz_path, f'-{BACKUP_GZIP_LEVEL}', '-c', '-p', str(os.cpu_count() or 1)], stdin=subprocess.PIPE, stdout=f_out, bufsize=BACKUP_COPY_BUFSIZE)
+                    try:
+                        shutil.copyfileobj(f_in, proc.stdin, BACKUP_COPY_BUFSIZE)
+                    finally:
+                        proc.stdin.close()
+                    if proc.wait() != 0:
+                        raise subprocess.CalledProcessError(proc.returncode, pigz_path)
+            else:
+                with gzip.GzipFile(final_backup_path, mode='wb', compresslevel=BACKUP_GZIP_LEVEL) as f_gz:
+                    shutil.copyfileobj(f_in, f_gz, BACKUP_COPY_BUFSIZE)
         
-        # 3. Generate a checksum for the compressed archive for integrity verification
+        # 3. Record the SHA256 checksum of the uncompressed database for integrity verification
         print("Generating SHA256 checksum...")
-        result = subprocess.run(['sha256sum', final_backup_path], capture_output=True, text=True)
-        if result.returncode == 0:
-            checksum = result.stdout.split()[0]
-            with open(checksum_file, 'w') as f:
-                f.write(checksum)
+        with open(checksum_file, 'w') as f:
+            f.write(f_in.hexdigest())
         
         # 4. Enforce retention policy: delete backups and their checksums older than 60 days
         print("Enforcing 60-day retention policy...")
-        subprocess.run(['find', Config.DB_BACKUPS_DIR, '-name', 'TrafficAnalyzer_*.db.gz', '-type', 'f', '-mtime', '+60', '-exec', 'rm', '-f', '{}', ';'], check=True)
-        subprocess.run(['find', Config.DB_BACKUPS_DIR, '-name', 'TrafficAnalyzer_*.db.gz.sha256', '-type', 'f', '-mtime', '+60', '-exec', 'rm', '-f', '{}', ';'], check=True)
+        _prune_old_backups(Config.DB_BACKUPS_DIR, 60)
         
         # 5. Clean up the temporary file
         if os.path.exists(temp_db_path):
@@ -99,31 +190,308 @@ def create_database_backup():
     except Exception as e:
         print(f"Error creating database backup: {e}")
 
+def _run_pipeline(producer_cmd, consumer_cmd, stdout=None):
+    """Runs `producer | consumer`, raising CalledProcessError if either side fails."""
+    producer = subprocess.Popen(producer_cmd, stdout=subprocess.PIPE)
+    try:
+        consumer = subprocess.run(consumer_cmd, stdin=producer.stdout, stdout=stdout)
+    finally:
+        producer.stdout.close()
+        producer.wait()
+    if producer.returncode != 0:
+        raise subprocess.CalledProcessError(producer.returncode, producer_cmd)
+    if consumer.returncode != 0:
+        raise subprocess.CalledProcessError(consumer.returncode, consumer_cmd)
+
 def create_manual_backup():
     """
     Creates a compressed archive of the data and db_backups folders.
+    Uses multithreaded zstd (.tar.zst) when available, otherwise tar's gzip (.tar.gz).
     """
     try:
+        import shutil
+
         # Ensure the backup directory exists
-        os.makedirs(Config.MANUAL_BACKUP_DIR, exist_ok=True)
+        manual_backup_dir = Config.manual_backup_dir()
+        os.makedirs(manual_backup_dir, exist_ok=True)
         
+        # Mark the data as current-format so restoring this archive can skip migration
+        with open(os.path.join(Config.DATA_DIR, FORMAT_VERSION_FILE), 'w') as f:
+            f.write(_format_version_str())
+
         # Create filename with improved naming scheme
-        now = datetime.now()
-        timestamp_str = now.strftime('%b-%d-%Y_%Hh-%Mm-%Ss')  # e.g., Aug-08-2025_20h-31m-37s
-        backup_file = os.path.join(Config.MANUAL_BACKUP_DIR, f"superman-backup-{timestamp_str}.tar.gz")
+        timestamp_str = time.strftime('%b-%d-%Y_%Hh-%Mm-%Ss')  # e.g., Aug-08-2025_20h-31m-37s
+        backup_base = os.path.join(manual_backup_dir, f"superman-backup-{timestamp_str}")
         
-        # Use subprocess to run tar command
-        subprocess.run(['tar', '-czf', backup_file, '-C', Config.BASE_DIR, 'data', 'db_backups'], check=True)
+        # Most of the archive is db_backups/*.db.gz, which is already compressed.
+        # zstd detects incompressible blocks and stores them raw, so it spends almost
+        # no CPU on them; gzip -1 (below) is the cheapest DEFLATE pass when zstd is missing.
+        zstd_path = shutil.which('zstd')
+        if zstd_path:
+            backup_file = f"{backup_base}.tar.zst"
+            _run_pipeline(['tar', '-cf', '-', '-C', Config.BASE_DIR, 'data', 'db_backups'],
+                          [zstd_path, '-T0', '-3', '-q', '-f', '-o', backup_file])
+        else:
+            # Compress outside tar so pigz can use every core; plain gzip otherwise
+            backup_file = f"{backup_base}.tar.gz"
+            pigz_path = shutil.which('pigz')
+            gzip_cmd = [pigz_path, '-p', str(os.cpu_count() or 1)] if pigz_path else ['gzip']
+            with open(backup_file, 'wb') as f_out:
+                _run_pipeline(['tar', '-cf', '-', '-C', Config.BASE_DIR, 'data', 'db_backups'],
+                              gzip_cmd + [f'-{BACKUP_GZIP_LEVEL}'], stdout=f_out)
         print(f"Manual backup created successfully: {backup_file}")
     except subprocess.CalledProcessError as e:
         print(f"Error creating manual backup: {e}")
     except Exception as e:
         print(f"An unexpected error occurred during backup: {e}")
 
+GIB = 1 << 30
+
+def _gb_to_bytes(gb):
+    """Converts a v2.0 GB figure to bytes; whole numbers are shifted instead of float-multiplied."""
+    if type(gb) is int:
+        return gb << 30
+    return int(gb * GIB)
+
+# Data format written by this version; manual backups record it in data/.format_version
+DATA_FORMAT_VERSION = (2, 1)
+FORMAT_VERSION_FILE = '.format_version'
+
+def _format_version_str():
+    return '.'.join(str(part) for part in DATA_FORMAT_VERSION)
+
+def _read_format_version(data_dir):
+    """Returns the data format recorded in data_dir as a comparable tuple, or (0,) if unknown."""
+    try:
+        with open(os.path.join(data_dir, FORMAT_VERSION_FILE), 'r') as f:
+            return tuple(int(part) for part in f.read().strip().split('.'))
+    except (OSError, ValueError):
+        return (0,)
+
+def _migrate_daily_file(filepath):
+    """
+    Converts one restored v2.0 daily_json file to the lean v2.1 format in place.
+    Runs in a worker process, so progress messages are returned instead of printed.
+    """
+    messages = []
+    filename = os.path.basename(filepath)
+    try:
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+        
+        # Check if this is an old format file. The definitive check is the lack of a 'stats_bytes' object.
+        is_v2_1_format = 'stats_bytes' in data
+
+        if not is_v2_1_format:
+            messages.append(f"Converting old format daily file: {filename}")
+            
+            # Get old stats, defaulting to empty if they don't exist
+            old_stats = data.get('stats', {})
+            
+            # Calculate total bytes, defaulting to 0
+            total_day_bytes = _gb_to_bytes(old_stats.get('traffic', 0))
+
+            # --- Rebuild the entire file from scratch to guarantee v2.1 structure ---
+
+            # 1. Rebuild stats_bytes
+            new_stats_bytes = {
+                'dl_bytes': _gb_to_bytes(old_stats.get('dl', 0)),
+                'ul_bytes': _gb_to_bytes(old_stats.get('ul', 0)),
+                'total_bytes': total_day_bytes,
+                'devices_count': old_stats.get('devices', 0)
+            }
+
+            # 2. Rebuild devices array, preserving the correct byte counts
+            new_devices_list = []
+            for device in data.get('devices', []):
+                # The v2.0 files already have the correct byte counts, just use them directly.
+                dl_b = device.get('dl_bytes', 0)
+                ul_b = device.get('ul_bytes', 0)
+                total_device_bytes = device.get('total_bytes', 0)
+
+                new_devices_list.append({
+                    'mac': device.get('mac'),
+                    'name': device.get('name'),
+                    'dl_bytes': dl_b,
+                    'ul_bytes': ul_b,
+                    'total_bytes': total_device_bytes,
+                    'percentage': (total_device_bytes / total_day_bytes * 100) if total_day_bytes > 0 else 0,
+                    'topApps': device.get('topApps', [])
+                })
+            data['devices'] = new_devices_list
+
+            # 3. Rebuild barChart
+            date_str = filename.replace('.json', '')
+            new_bar_chart = {
+                'title': 'Daily Breakdown',
+                'labels': [date_str],
+                'values_bytes': [total_day_bytes]
+            }
+
+            # 4. Rebuild topApps at root level
+            new_top_apps = data.get('topApps', [])
+
+            # 5. Assemble the new, clean data object
+            data = {
+                'stats_bytes': new_stats_bytes,
+                'barChart': new_bar_chart,
+                'devices': sorted(new_devices_list, key=lambda x: x['total_bytes'], reverse=True),
+                'topApps': new_top_apps
+            }
+            
+            # Save the completely rebuilt file
+            with open(filepath, 'w') as f:
+                f.write(json.dumps(data, separators=(',', ':')))
+                
+            messages.append(f"Converted {filename} to lean format")
+    except Exception as e:
+        messages.append(f"Warning: Could not convert {filename}: {e}")
+    return messages
+
+def _migrate_period_file(filepath):
+    """
+    Converts one restored v2.0 period_data file to the lean v2.1 format in place.
+    Runs in a worker process, so progress messages are returned instead of printed.
+    """
+    messages = []
+    filename = os.path.basename(filepath)
+    try:
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+        
+        # Check if this is an old format file (has stats but no stats_bytes)
+        if 'stats' in data and 'stats_bytes' not in data:
+            messages.append(f"Converting old format period file: {filename}")
+            
+            # Convert old format to new lean format
+            old_stats = data.get('stats', {})
+            
+            # Add byte values for stats and remove the old stats section
+            data['stats_bytes'] = {
+                'dl_bytes': _gb_to_bytes(old_stats.get('dl', 0)),
+                'ul_bytes': _gb_to_bytes(old_stats.get('ul', 0)),
+                'total_bytes': _gb_to_bytes(old_stats.get('traffic', 0)),
+                'devices_count': old_stats.get('devices', 0),
+                'monthlyQuotaGB': old_stats.get('monthlyQuotaGB', 500)
+            }
+            
+            # Remove the old stats section
+            del data['stats']
+            
+            # Convert device data if present
+            for device in data.get('devices', []):
+                if 'dl' in device and 'dl_bytes' not in device:
+                    device['dl_bytes'] = _gb_to_bytes(device['dl'])
+                    del device['dl']
+                if 'ul' in device and 'ul_bytes' not in device:
+                    device['ul_bytes'] = _gb_to_bytes(device['ul'])
+                    del device['ul']
+                if 'total' in device and 'total_bytes' not in device:
+                    device['total_bytes'] = _gb_to_bytes(device['total'])
+                    del device['total']
+                # Convert topApps data if present
+                for app in device.get('topApps', []):
+                    if 'total' in app and 'total_bytes' not in app:
+                        app['total_bytes'] = _gb_to_bytes(app['total'])
+                        del app['total']
+            
+            # Convert topApps data at root level if present
+            for app in data.get('topApps', []):
+                if 'total' in app and 'total_bytes' not in app:
+                    app['total_bytes'] = _gb_to_bytes(app['total'])
+                    del app['total']
+            
+            # Convert barChart values if present
+            if 'barChart' in data and 'values' in data['barChart'] and 'values_bytes' not in data['barChart']:
+                data['barChart']['values_bytes'] = [_gb_to_bytes(v) for v in data['barChart']['values']]
+                del data['barChart']['values']
+            
+            # Save the converted file
+            with open(filepath, 'w') as f:
+                f.write(json.dumps(data, separators=(',', ':')))
+                
+            messages.append(f"Converted {filename} to lean format")
+    except Exception as e:
+        messages.append(f"Warning: Could not convert {filename}: {e}")
+    return messages
+
+# Below this many files, forking workers costs more than the migration itself
+MIGRATION_PARALLEL_MIN_FILES = 32
+
+def _migrate_files(migrate_func, filepaths):
+    """Runs a per-file migration over filepaths on several cores, printing messages in order."""
+    workers = min(Config.MAX_WORKER_PROCESSES, os.cpu_count() or 1, len(filepaths) // 8 or 1)
+    done = 0
+    if workers > 1 and len(filepaths) >= MIGRATION_PARALLEL_MIN_FILES:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        chunksize = max(1, len(filepaths) // (workers * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for messages in executor.map(migrate_func, filepaths, chunksize=chunksize):
+                    _print_migration_messages([messages])
+                    done += 1
+        except (NotImplementedError, OSError, BrokenProcessPool) as e:
+            # No working semaphores (no /dev/shm) or a worker was killed:
+            # migrate the files not yet reported in this process instead
+            print(f"WARNING: Worker processes failed ({e}). Migrating remaining files serially.")
+    _print_migration_messages(map(migrate_func, filepaths[done:]))
+
+def _print_migration_messages(results):
+    for messages in results:
+        for message in messages:
+            print(message)
+
+def _move_dir(src, dst):
+    """Renames src to dst in one syscall, copying instead if they are on different filesystems."""
+    import shutil
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+def _migrate_restored_data(temp_restore_dir):
+    """Upgrades v2.0 file names and JSON formats inside an extracted backup."""
+    # --- Migration Step for v2.0 backups ---
+    print("Checking for old filename formats to migrate...")
+    restored_period_dir = os.path.join(temp_restore_dir, 'data', 'period_data')
+    if os.path.exists(restored_period_dir):
+        # Snapshot the listing first since entries are renamed in place
+        with os.scandir(restored_period_dir) as it:
+            entries = list(it)
+        period_prefix = restored_period_dir + os.sep
+        for entry in entries:
+            filename = entry.name
+            if '_' in filename and filename.startswith('traffic_period_'):
+                parts = filename.replace('.json', '').split('_')
+                if len(parts) == 4: # traffic_period_YYYY-MM-DD_YYYY-MM-DD
+                    new_filename = f"traffic_period_{parts[2]}-{parts[3]}.json"
+                    new_path = period_prefix + new_filename
+                    print(f"Migrating old backup file: {filename} -> {new_filename}")
+                    os.rename(entry.path, new_path)
+    
+    # --- Migration Step for v2.0 data format ---
+    print("Checking for old data format to migrate...")
+    restored_daily_dir = os.path.join(temp_restore_dir, 'data', 'daily_json')
+    if os.path.exists(restored_daily_dir):
+        with os.scandir(restored_daily_dir) as it:
+            daily_paths = [e.path for e in it if e.name.endswith('.json')]
+        _migrate_files(_migrate_daily_file, daily_paths)
+    
+    # Convert period data files
+    restored_period_dir = os.path.join(temp_restore_dir, 'data', 'period_data')
+    if os.path.exists(restored_period_dir):
+        with os.scandir(restored_period_dir) as it:
+            period_paths = [e.path for e in it if e.name.endswith('.json')]
+        _migrate_files(_migrate_period_file, period_paths)
+
 def restore_manual_backup(backup_file_path):
     """
     Restores data and db_backups folders from a compressed archive.
     """
+    import shutil
     temp_restore_dir = None
     try:
         if not os.path.exists(backup_file_path):
@@ -131,187 +499,39 @@ def restore_manual_backup(backup_file_path):
             return
 
         # Create a temporary directory for extraction
-        temp_restore_dir = os.path.join(Config.BASE_DIR, 'tmp_restore_' + datetime.now().strftime('%Y%m%d%H%M%S'))
+        temp_restore_dir = os.path.join(Config.BASE_DIR, 'tmp_restore_' + time.strftime('%Y%m%d%H%M%S'))
         os.makedirs(temp_restore_dir, exist_ok=True)
 
         # Extract the archive to the temporary directory
         print("Extracting backup...")
-        subprocess.run(['tar', '-xzf', backup_file_path, '-C', temp_restore_dir], check=True)
-
-        # --- Migration Step for v2.0 backups ---
-        print("Checking for old filename formats to migrate...")
-        restored_period_dir = os.path.join(temp_restore_dir, 'data', 'period_data')
-        if os.path.exists(restored_period_dir):
-            for filename in os.listdir(restored_period_dir):
-                if '_' in filename and filename.startswith('traffic_period_'):
-                    parts = filename.replace('.json', '').split('_')
-                    if len(parts) == 4: # traffic_period_YYYY-MM-DD_YYYY-MM-DD
-                        new_filename = f"traffic_period_{parts[2]}-{parts[3]}.json"
-                        old_path = os.path.join(restored_period_dir, filename)
-                        new_path = os.path.join(restored_period_dir, new_filename)
-                        print(f"Migrating old backup file: {filename} -> {new_filename}")
-                        os.rename(old_path, new_path)
-        
-        # --- Migration Step for v2.0 data format ---
-        print("Checking for old data format to migrate...")
-        restored_daily_dir = os.path.join(temp_restore_dir, 'data', 'daily_json')
-        if os.path.exists(restored_daily_dir):
-            for filename in os.listdir(restored_daily_dir):
-                if filename.endswith('.json'):
-                    filepath = os.path.join(restored_daily_dir, filename)
-                    try:
-                        with open(filepath, 'r') as f:
-                            data = json.load(f)
-                        
-                        # Check if this is an old format file. The definitive check is the lack of a 'stats_bytes' object.
-                        is_v2_1_format = 'stats_bytes' in data
-
-                        if not is_v2_1_format:
-                            print(f"Converting old format daily file: {filename}")
-                            
-                            # Get old stats, defaulting to empty if they don't exist
-                            old_stats = data.get('stats', {})
-                            
-                            # Calculate total bytes, defaulting to 0
-                            total_day_bytes = int(old_stats.get('traffic', 0) * 1073741824)
-
-                            # --- Rebuild the entire file from scratch to guarantee v2.1 structure ---
-
-                            # 1. Rebuild stats_bytes
-                            new_stats_bytes = {
-                                'dl_bytes': int(old_stats.get('dl', 0) * 1073741824),
-                                'ul_bytes': int(old_stats.get('ul', 0) * 1073741824),
-                                'total_bytes': total_day_bytes,
-                                'devices_count': old_stats.get('devices', 0)
-                            }
-
-                            # 2. Rebuild devices array, preserving the correct byte counts
-                            new_devices_list = []
-                            for device in data.get('devices', []):
-                                # The v2.0 files already have the correct byte counts, just use them directly.
-                                dl_b = device.get('dl_bytes', 0)
-                                ul_b = device.get('ul_bytes', 0)
-                                total_device_bytes = device.get('total_bytes', 0)
-
-                                new_devices_list.append({
-                                    'mac': device.get('mac'),
-                                    'name': device.get('name'),
-                                    'dl_bytes': dl_b,
-                                    'ul_bytes': ul_b,
-                                    'total_bytes': total_device_bytes,
-                                    'percentage': (total_device_bytes / total_day_bytes * 100) if total_day_bytes > 0 else 0,
-                                    'topApps': device.get('topApps', [])
-                                })
-                            data['devices'] = new_devices_list
-
-                            # 3. Rebuild barChart
-                            date_str = filename.replace('.json', '')
-                            new_bar_chart = {
-                                'title': 'Daily Breakdown',
-                                'labels': [date_str],
-                                'values_bytes': [total_day_bytes]
-                            }
-
-                            # 4. Rebuild topApps at root level
-                            new_top_apps = data.get('topApps', [])
-
-                            # 5. Assemble the new, clean data object
-                            data = {
-                                'stats_bytes': new_stats_bytes,
-                                'barChart': new_bar_chart,
-                                'devices': sorted(new_devices_list, key=lambda x: x['total_bytes'], reverse=True),
-                                'topApps': new_top_apps
-                            }
-                            
-                            # Save the completely rebuilt file
-                            with open(filepath, 'w') as f:
-                                json.dump(data, f, indent=2)
-                                
-                            print(f"Converted {filename} to lean format")
-                    except Exception as e:
-                        print(f"Warning: Could not convert {filename}: {e}")
-        
-        # Convert period data files
-        restored_period_dir = os.path.join(temp_restore_dir, 'data', 'period_data')
-        if os.path.exists(restored_period_dir):
-            for filename in os.listdir(restored_period_dir):
-                if filename.endswith('.json'):
-                    filepath = os.path.join(restored_period_dir, filename)
-                    try:
-                        with open(filepath, 'r') as f:
-                            data = json.load(f)
-                        
-                        # Check if this is an old format file (has stats but no stats_bytes)
-                        if 'stats' in data and 'stats_bytes' not in data:
-                            print(f"Converting old format period file: {filename}")
-                            
-                            # Convert old format to new lean format
-                            old_stats = data.get('stats', {})
-                            
-                            # Add byte values for stats and remove the old stats section
-                            data['stats_bytes'] = {
-                                'dl_bytes': int(old_stats.get('dl', 0) * 1073741824),
-                                'ul_bytes': int(old_stats.get('ul', 0) * 1073741824),
-                                'total_bytes': int(old_stats.get('traffic', 0) * 1073741824),
-                                'devices_count': old_stats.get('devices', 0),
-                                'monthlyQuotaGB': old_stats.get('monthlyQuotaGB', 500)
-                            }
-                            
-                            # Remove the old stats section
-                            del data['stats']
-                            
-                            # Convert device data if present
-                            for device in data.get('devices', []):
-                                if 'dl' in device and 'dl_bytes' not in device:
-                                    device['dl_bytes'] = int(device['dl'] * 1073741824)
-                                    del device['dl']
-                                if 'ul' in device and 'ul_bytes' not in device:
-                                    device['ul_bytes'] = int(device['ul'] * 1073741824)
-                                    del device['ul']
-                                if 'total' in device and 'total_bytes' not in device:
-                                    device['total_bytes'] = int(device['total'] * 1073741824)
-                                    del device['total']
-                                # Convert topApps data if present
-                                for app in device.get('topApps', []):
-                                    if 'total' in app and 'total_bytes' not in app:
-                                        app['total_bytes'] = int(app['total'] * 1073741824)
-                                        del app['total']
-                            
-                            # Convert topApps data at root level if present
-                            for app in data.get('topApps', []):
-                                if 'total' in app and 'total_bytes' not in app:
-                                    app['total_bytes'] = int(app['total'] * 1073741824)
-                                    del app['total']
-                            
-                            # Convert barChart values if present
-                            if 'barChart' in data and 'values' in data['barChart'] and 'values_bytes' not in data['barChart']:
-                                data['barChart']['values_bytes'] = [int(v * 1073741824) for v in data['barChart']['values']]
-                                del data['barChart']['values']
-                            
-                            # Save the converted file
-                            with open(filepath, 'w') as f:
-                                json.dump(data, f, indent=2)
-                                
-                            print(f"Converted {filename} to lean format")
-                    except Exception as e:
-                        print(f"Warning: Could not convert {filename}: {e}")
-        
+        if backup_file_path.endswith('.zst'):
+            _run_pipeline(['zstd', '-dc', backup_file_path], ['tar', '-xf', '-', '-C', temp_restore_dir])
+        else:
+            subprocess.run(['tar', '-xzf', backup_file_path, '-C', temp_restore_dir], check=True)
+
+        # Backups written by this version carry a format marker and need no migration
+        if _read_format_version(os.path.join(temp_restore_dir, 'data')) >= DATA_FORMAT_VERSION:
+            print(f"Backup data is already in v{_format_version_str()} format, skipping migration.")
+        else:
+            _migrate_restored_data(temp_restore_dir)
+
         # Remove current data and db_backups directories
         print("Replacing current data with backup...")
-        if os.path.exists(Config.DATA_DIR): subprocess.run(['rm', '-rf', Config.DATA_DIR], check=True)
-        if os.path.exists(Config.DB_BACKUPS_DIR): subprocess.run(['rm', '-rf', Config.DB_BACKUPS_DIR], check=True)
+        if os.path.exists(Config.DATA_DIR): shutil.rmtree(Config.DATA_DIR)
+        if os.path.exists(Config.DB_BACKUPS_DIR): shutil.rmtree(Config.DB_BACKUPS_DIR)
 
         # Move restored contents to BASE_DIR
-        subprocess.run(['mv', os.path.join(temp_restore_dir, 'data'), Config.BASE_DIR], check=True)
+        _move_dir(os.path.join(temp_restore_dir, 'data'), os.path.join(Config.BASE_DIR, 'data'))
         if os.path.exists(os.path.join(temp_restore_dir, 'db_backups')):
-            subprocess.run(['mv', os.path.join(temp_restore_dir, 'db_backups'), Config.BASE_DIR], check=True)
+            _move_dir(os.path.join(temp_restore_dir, 'db_backups'), os.path.join(Config.BASE_DIR, 'db_backups'))
 
         # Clean up .sha256 checksum files from daily_json directory
         daily_json_dir = os.path.join(Config.DATA_DIR, 'daily_json')
         if os.path.exists(daily_json_dir):
-            for filename in os.listdir(daily_json_dir):
-                if filename.endswith('.sha256'):
-                    os.remove(os.path.join(daily_json_dir, filename))
+            with os.scandir(daily_json_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.sha256'):
+                        os.remove(entry.path)
             print("Cleaned up .sha256 checksum files from daily_json directory")
 
         print(f"Manual backup restored successfully from {os.path.basename(backup_file_path)}")
@@ -322,7 +542,7 @@ def restore_manual_backup(backup_file_path):
     finally:
         # Clean up temporary directory
         if temp_restore_dir is not None and os.path.exists(temp_restore_dir):
-            subprocess.run(['rm', '-rf', temp_restore_dir], check=True)
+            shutil.rmtree(temp_restore_dir, ignore_errors=True)
 
 def ensure_cron_jobs():
     """Ensure cron jobs are set up for the application."""
@@ -367,7 +587,10 @@ def main():
                     host_ip = "127.0.0.1"
             else:
                 host_ip = Config.WEB_SERVER_HOST
-            app.run(host=host_ip, port=8082)
+            # Flask is only needed here, so cron commands (monitor, rollup, backup) don't load it
+            from .api import app
+            # Handle requests on separate threads so a slow report or download doesn't block the dashboard
+            app.run(host=host_ip, port=8082, threaded=True)
         elif command == 'rollup':
             day = sys.argv[3] if len(sys.argv) > 3 else 'today'
             if day == 'today':
@@ -409,7 +632,8 @@ def main():
             else:
                 restore_manual_backup(sys.argv[2])
         elif command == 'monthly-aggregator':
-            create_monthly_reports()
+            # Manual runs rebuild every month, so reports pick up format changes
+            create_monthly_reports(force=True)
         elif command == 'import-history':
             if import_history_from_router():
                 print("Import-history completed successfully.")
@@ -24,20 +24,21 @@ def detect_usb_backup_dir():
     for mount_base in mount_patterns:
         if os.path.exists(mount_base):
             try:
-                # List directories in mount point
-                for item in os.listdir(mount_base):
-                    usb_path = os.path.join(mount_base, item)
-                    if os.path.isdir(usb_path):
-                        # Check if this directory contains our project
-                        has_project = True
-                        for identifier in project_identifiers:
-                            if not os.path.exists(os.path.join(usb_path, identifier)):
-                                has_project = False
-                                break
-                        
-                        # If we found our project, set the backup directory
-                        if has_project:
-                            return os.path.join(usb_path, 'superman-backups')
+                # List directories in mount point (d_type from scandir avoids a stat per entry)
+                with os.scandir(mount_base) as it:
+                    for entry in it:
+                        if entry.is_dir():
+                            usb_path = entry.path
+                            # Check if this directory contains our project
+                            has_project = True
+                            for identifier in project_identifiers:
+                                if not os.path.exists(os.path.join(usb_path, identifier)):
+                                    has_project = False
+                                    break
+                            
+                            # If we found our project, set the backup directory
+                            if has_project:
+                                return os.path.join(usb_path, 'superman-backups')
             except (OSError, PermissionError):
                 # Skip directories we can't read
                 continue
@@ -55,7 +56,7 @@ class Config:
     DAILY_DIR = os.path.join(DATA_DIR, 'daily_json')
     PERIOD_DIR = os.path.join(DATA_DIR, 'period_data')
     DB_BACKUPS_DIR = os.path.join(BASE_DIR, 'db_backups')
-    MANUAL_BACKUP_DIR = detect_usb_backup_dir()  # Auto-detect USB backup directory
+    MANUAL_BACKUP_DIR = None  # Auto-detected on first use, see manual_backup_dir()
     LOGS_DIR = os.path.join(BASE_DIR, 'logs')
     WWW_DIR = os.path.join(BASE_DIR, 'www')
     
@@ -79,6 +80,22 @@ class Config:
     # "0.0.0.0": (UNSAFE) Listens on all network interfaces. This can expose the dashboard to the public internet (WAN). Use with caution and a strong password.
     WEB_SERVER_HOST = "lan_only"
 
+    # --- Static File Delivery ---
+    # Files are already handed to the WSGI server's wsgi.file_wrapper (sendfile under gunicorn/uWSGI).
+    # Set to True only when a front-end server that honours X-Sendfile (lighttpd, Apache mod_xsendfile)
+    # proxies the dashboard: it then sends the file itself and Python never touches the bytes.
+    USE_X_SENDFILE = False
+
+    # --- Report Files ---
+    # Daily/period JSON is written compact since only the dashboard and the report
+    # builders read it. Set to True to indent the files when inspecting them by hand.
+    PRETTY_REPORT_JSON = False
+
+    # --- Worker Processes ---
+    # Monthly report builds and report-file migrations fan out to at most this many
+    # processes. Each one holds its own copy of the data it parses, so keep it low on the router.
+    MAX_WORKER_PROCESSES = 2
+
     PASSWORD_FILE = os.path.join(DATA_DIR, '.password')
 
     # Quota configuration - flexible period-based quotas
@@ -89,6 +106,13 @@ class Config:
     # Device high usage alert threshold for single-day views
     DEVICE_HIGH_USAGE_ALERT_GB = 5  # Single-day usage threshold for device alerts
 
+    @staticmethod
+    def manual_backup_dir():
+        """Returns MANUAL_BACKUP_DIR, scanning USB mounts for it only when a manual backup needs it."""
+        if Config.MANUAL_BACKUP_DIR is None:
+            Config.MANUAL_BACKUP_DIR = detect_usb_backup_dir()
+        return Config.MANUAL_BACKUP_DIR
+
     @staticmethod
     def ensure_dirs():
         """Ensures all necessary directories exist."""
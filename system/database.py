@@ -1,26 +1,265 @@
 import sqlite3
 import os
 import shutil
-import glob
-from datetime import datetime, timedelta
+import atexit
+import logging
+import threading
+import weakref
+from datetime import datetime
 from .config import Config
 
-def get_db_connection():
-    """Establishes a connection to the SQLite database."""
+logger = logging.getLogger(__name__)
+
+def _configure(conn, read_only=False):
+    """
+    Applies the per-connection performance PRAGMAs.
+    WAL is only switched on for our own traffic.db; the router's database and
+    backup copies keep whatever journal mode they already have.
+    """
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -16000")
+    conn.execute("PRAGMA mmap_size = 268435456")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+def _close(conn):
+    """Closes a connection, letting SQLite refresh planner statistics first."""
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+
+class _CachedConnection(sqlite3.Connection):
+    """
+    Reader connection handed out by get_db_connection() from a small
+    process-wide pool. close() returns it to the pool so the next caller, in
+    any thread, keeps its page cache; release() drops the connection for good.
+    """
+    key = None
+
+    def close(self):
+        _return_reader_connection(self)
+
+    def release(self):
+        self.key = None
+        try:
+            self.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        finally:
+            sqlite3.Connection.close(self)
+
+# Idle reader connections shared by every thread. The dashboard server starts a
+# new thread per request, so connections have to outlive the thread to be reused.
+READER_POOL_SIZE = 4
+_reader_pool = []
+_reader_conns = weakref.WeakSet()
+_reader_conns_lock = threading.Lock()
+
+def _file_id(path):
+    """Returns (st_dev, st_ino) for path, or None if it doesn't exist yet."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+def _db_path():
+    """Resolves the database file that get_db_connection() should open."""
     # When running on a router, use the local traffic.db file instead of the live database
     if os.path.exists(Config.ROUTER_DB_PATH) and Config.LIVE_DB_PATH == Config.ROUTER_DB_PATH:
-        return sqlite3.connect(Config.LOCAL_DB_PATH)
-    return sqlite3.connect(Config.LIVE_DB_PATH)
+        return Config.LOCAL_DB_PATH
+    return Config.LIVE_DB_PATH
+
+def get_db_connection():
+    """
+    Returns a query-only connection to the SQLite database, reusing an idle one
+    from the pool when possible. Pooled connections are reopened when the
+    database path changes or the file is replaced underneath them (e.g. by
+    restore_db_from_backup).
+    """
+    db_path = _db_path()
+    key = (db_path, _file_id(db_path))
+    conn = None
+    stale = []
+    with _reader_conns_lock:
+        while _reader_pool:
+            candidate = _reader_pool.pop()
+            if candidate.key == key:
+                conn = candidate
+                break
+            stale.append(candidate)
+    for old in stale:
+        old.release()
+    if conn is not None:
+        return conn
+
+    conn = sqlite3.connect(db_path, factory=_CachedConnection, check_same_thread=False)
+    # Readers are query-only: under WAL they never take the write lock, so
+    # dashboard/report reads proceed while a sync transaction is open
+    _configure(conn, read_only=True)
+    conn.key = key
+    with _reader_conns_lock:
+        _reader_conns.add(conn)
+    return conn
+
+def _return_reader_connection(conn):
+    """Puts a closed-by-caller reader back in the pool, or releases it if the pool is full."""
+    with _reader_conns_lock:
+        if conn in _reader_pool:
+            return
+        if conn.key is not None and len(_reader_pool) < READER_POOL_SIZE:
+            _reader_pool.append(conn)
+            return
+    conn.release()
+
+@atexit.register
+def _release_reader_connections():
+    with _reader_conns_lock:
+        conns = list(_reader_conns)
+        _reader_conns.clear()
+        _reader_pool.clear()
+    for conn in conns:
+        conn.release()
 
 def get_router_db_connection():
     """Establishes a connection to the router's live SQLite database."""
     if os.path.exists(Config.ROUTER_DB_PATH):
-        return sqlite3.connect(Config.ROUTER_DB_PATH)
+        return _configure(sqlite3.connect(Config.ROUTER_DB_PATH), read_only=True)
     return None
 
 def get_local_traffic_db_connection():
-    """Establishes a connection to the local traffic.db database."""
-    return sqlite3.connect(Config.LOCAL_DB_PATH)
+    """
+    Establishes a connection to the local traffic.db database.
+    The connection is in autocommit mode; batch writers open their own
+    BEGIN IMMEDIATE / COMMIT bracket.
+    """
+    return _configure(sqlite3.connect(Config.LOCAL_DB_PATH, isolation_level=None, uri=True))
+
+# Statements are module constants so every sync reuses the same SQL text
+# (and sqlite3's per-connection statement cache entry)
+# Key columns are NOT NULL in a WITHOUT ROWID table, so a NULL mac or app_name
+# is stored as '' rather than the row being dropped by INSERT OR IGNORE
+_COPY_SQL = """
+    INSERT OR IGNORE INTO main.traffic (mac, app_name, cat_name, timestamp, tx, rx)
+    SELECT COALESCE(mac, ''), COALESCE(app_name, ''), cat_name, timestamp, tx, rx
+    FROM router.traffic
+"""
+# The sync window is small; no ORDER BY, the primary key resolves duplicates
+_SYNC_SQL = _COPY_SQL + f"""
+    WHERE timestamp >= CAST(strftime('%s', 'now', '-{Config.SYNC_WINDOW_HOURS} hours') AS INTEGER)
+"""
+# The full-history import feeds rows in primary-key order, so inserts into
+# the WITHOUT ROWID table append to the B-tree instead of landing at random
+_IMPORT_SQL = _COPY_SQL + """
+    ORDER BY mac, timestamp, app_name
+"""
+
+# Writer connection to traffic.db with the router database ATTACHed as
+# "router", kept open across sync cycles. Guarded by _sync_lock.
+_sync_conn = None
+_sync_key = None
+_sync_lock = threading.Lock()
+
+def _get_sync_connection():
+    """
+    Returns the cached sync connection, reopening it when traffic.db or the
+    router database has been replaced (restore, router reset) since it was
+    opened. Caller must hold _sync_lock.
+    """
+    global _sync_conn, _sync_key
+    key = (_file_id(Config.LOCAL_DB_PATH), _file_id(Config.ROUTER_DB_PATH))
+    if _sync_conn is not None and _sync_key == key:
+        return _sync_conn
+    _drop_sync_connection()
+
+    from urllib.parse import quote
+    conn = get_local_traffic_db_connection()
+    router_uri = f"file:{quote(os.path.abspath(Config.ROUTER_DB_PATH))}?mode=ro"
+    try:
+        conn.execute("ATTACH DATABASE ? AS router", (router_uri,))
+    except Exception:
+        _close(conn)
+        raise
+    _sync_conn = conn
+    _sync_key = (_file_id(Config.LOCAL_DB_PATH), _file_id(Config.ROUTER_DB_PATH))
+    return conn
+
+def _drop_sync_connection():
+    """Closes the cached sync connection, if any. Caller must hold _sync_lock."""
+    global _sync_conn, _sync_key
+    conn, _sync_conn, _sync_key = _sync_conn, None, None
+    if conn is not None:
+        try:
+            conn.execute("DETACH DATABASE router")
+        except sqlite3.Error:
+            pass
+        _close(conn)
+
+@atexit.register
+def _release_sync_connection():
+    with _sync_lock:
+        _drop_sync_connection()
+
+# SQLite handles must not be used, or closed, by a forked child (e.g. a
+# ProcessPoolExecutor worker). The child parks the ones it inherited here for
+# the rest of its life and opens its own on demand.
+_inherited_conns = []
+
+def _forget_connections_after_fork():
+    global _reader_pool, _reader_conns, _reader_conns_lock, _sync_conn, _sync_key, _sync_lock
+    _inherited_conns.extend(_reader_conns)
+    if _sync_conn is not None:
+        _inherited_conns.append(_sync_conn)
+    _reader_pool = []
+    _reader_conns = weakref.WeakSet()
+    _reader_conns_lock = threading.Lock()
+    _sync_conn = None
+    _sync_key = None
+    _sync_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_connections_after_fork)
+
+def _copy_from_router(copy_sql, bulk=False):
+    """
+    Copies router traffic rows into the local traffic table by running
+    copy_sql (_SYNC_SQL or _IMPORT_SQL), a single INSERT OR IGNORE ... SELECT
+    against the ATTACHed router database, so rows never round-trip through
+    Python.
+    bulk widens the page cache for the duration of the copy and lets the
+    ORDER BY sort spill to a temp file instead of memory.
+    Returns the number of newly inserted rows.
+    """
+    with _sync_lock:
+        local_conn = _get_sync_connection()
+        try:
+            if bulk:
+                local_conn.execute("PRAGMA cache_size = -64000")
+                local_conn.execute("PRAGMA temp_store = FILE")
+            changes_before = local_conn.total_changes
+            local_conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Insert records into local database, ignoring duplicates
+                local_conn.execute(copy_sql)
+            except Exception:
+                local_conn.execute("ROLLBACK")
+                raise
+            local_conn.execute("COMMIT")
+            if bulk:
+                local_conn.execute("PRAGMA cache_size = -16000")
+                local_conn.execute("PRAGMA temp_store = MEMORY")
+            return local_conn.total_changes - changes_before
+        except Exception:
+            # Start from a fresh connection next cycle
+            _drop_sync_connection()
+            raise
 
 def sync_data_from_router():
     """
@@ -28,149 +267,151 @@ def sync_data_from_router():
     Uses a rolling window approach to handle router database resets.
     """
     try:
-        # Connect to both databases
-        router_conn = get_router_db_connection()
-        if not router_conn:
-            print("Router database not found. Skipping sync.")
+        if not os.path.exists(Config.ROUTER_DB_PATH):
+            logger.warning("Router database not found. Skipping sync.")
             return False
             
-        # Set router connection to read-only mode to prevent any writes
-        router_conn.execute("PRAGMA query_only = ON")
-            
-        local_conn = get_local_traffic_db_connection()
-        
-        # Use a rolling window (last 48 hours) to handle router resets
-        window_start_time = int((datetime.now() - timedelta(hours=48)).timestamp())
-        print(f"Syncing data from last 48 hours (timestamp >= {window_start_time})")
-        
-        # Get records from router database within the rolling window
-        router_cursor = router_conn.cursor()
-        router_cursor.execute("""
-            SELECT mac, app_name, cat_name, timestamp, tx, rx
-            FROM traffic 
-            WHERE timestamp >= ?
-            ORDER BY timestamp
-        """, (window_start_time,))
+        # Use a rolling window (last Config.SYNC_WINDOW_HOURS hours) to handle router resets;
+        # the cutoff is computed by SQLite inside _SYNC_SQL
+        logger.info("Syncing data from last %d hours", Config.SYNC_WINDOW_HOURS)
         
-        records = router_cursor.fetchall()
-        print(f"Found {len(records)} records in sync window")
+        # Copy records from router database within the rolling window
+        inserted_count = _copy_from_router(_SYNC_SQL)
         
-        if records:
-            # Insert records into local database, ignoring duplicates
-            local_cursor = local_conn.cursor()
-            local_cursor.executemany("""
-                INSERT OR IGNORE INTO traffic (mac, app_name, cat_name, timestamp, tx, rx) 
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, records)
-            local_conn.commit()
-            inserted_count = local_cursor.rowcount
-            print(f"Successfully synced {inserted_count} new records")
+        if inserted_count:
+            logger.info("Successfully synced %d new records", inserted_count)
         else:
-            print("No new records to sync")
-            
-        # Close connections
-        router_conn.close()
-        local_conn.close()
+            logger.info("No new records to sync")
         
         return True
     except Exception as e:
-        print(f"Error syncing data from router: {e}")
+        logger.error("Error syncing data from router: %s", e)
         return False
 
+TRAFFIC_TABLE_SQL = """
+    CREATE TABLE {name} (
+        mac TEXT,
+        app_name VARCHAR(50),
+        cat_name VARCHAR(50),
+        timestamp UNSIGNED BIG INT,
+        tx UNSIGNED BIG INT,
+        rx UNSIGNED BIG INT,
+        PRIMARY KEY (mac, timestamp, app_name)
+    ) WITHOUT ROWID;
+"""
+
+def _migrate_to_without_rowid(conn):
+    """
+    Rebuilds a rowid traffic table as WITHOUT ROWID in one transaction.
+    A NULL mac or app_name is kept as '' (key columns can't be NULL here);
+    duplicates left by the pre-PK schema are skipped.
+    """
+    logger.info("Migrating traffic table to WITHOUT ROWID storage...")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DROP TABLE IF EXISTS traffic_new")
+        conn.execute(TRAFFIC_TABLE_SQL.format(name="traffic_new"))
+        conn.execute("""
+            INSERT OR IGNORE INTO traffic_new (mac, app_name, cat_name, timestamp, tx, rx)
+            SELECT COALESCE(mac, ''), COALESCE(app_name, ''), cat_name, timestamp, tx, rx FROM traffic
+        """)
+        conn.execute("DROP TABLE traffic")
+        conn.execute("ALTER TABLE traffic_new RENAME TO traffic")
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+# Database paths init_db() has already prepared in this process
+_initialized_paths = set()
+
 def init_db():
-    # When running on a router, initialize the local traffic.db file
-    if os.path.exists(Config.ROUTER_DB_PATH) and Config.LIVE_DB_PATH == Config.ROUTER_DB_PATH:
-        conn = sqlite3.connect(Config.LOCAL_DB_PATH)
-    else:
-        conn = get_db_connection()
+    db_path = _db_path()
+    if db_path in _initialized_paths:
+        return
+    # When running on a router, _db_path() is the local traffic.db file.
+    # Schema changes need a writable connection, not the query-only reader.
+    conn = _configure(sqlite3.connect(db_path, isolation_level=None))
     cursor = conn.cursor()
     
-    # Check if the traffic table exists and has the correct schema
-    cursor.execute("PRAGMA table_info(traffic)")
-    columns = cursor.fetchall()
-    
-    # If table doesn't exist, create it with the correct schema
-    if not columns:
-        cursor.execute("""
-            CREATE TABLE traffic (
-                mac TEXT,
-                app_name VARCHAR(50),
-                cat_name VARCHAR(50),
-                timestamp UNSIGNED BIG INT,
-                tx UNSIGNED BIG INT,
-                rx UNSIGNED BIG INT,
-                PRIMARY KEY (mac, timestamp, app_name)
-            );
-        """)
-    else:
-        # Check if we have the primary key constraint
-        # We can check this by looking for existing data and trying to insert duplicates
-        # For now, let's just ensure the table is created properly for new databases
-        # Existing databases with the old schema will need manual migration or will continue to have the duplication issue
-        pass
-    
     # Create the traffic table with schema identical to the router's TrafficAnalyzer.db
     # Note: We omit the 'id' column to maintain exact schema compatibility
-    # We also add a PRIMARY KEY constraint to prevent duplicates
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS traffic (
-            mac TEXT,
-            app_name VARCHAR(50),
-            cat_name VARCHAR(50),
-            timestamp UNSIGNED BIG INT,
-            tx UNSIGNED BIG INT,
-            rx UNSIGNED BIG INT,
-            PRIMARY KEY (mac, timestamp, app_name)
-        );
-    """)
-
-    # Index on timestamp for all aggregation/sync queries that filter by timestamp range
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_traffic_timestamp ON traffic(timestamp);")
+    # We also add a PRIMARY KEY constraint to prevent duplicates. The table is
+    # WITHOUT ROWID so rows live in a single B-tree keyed by that primary key.
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'traffic'")
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute(TRAFFIC_TABLE_SQL.format(name="traffic"))
+    elif "WITHOUT ROWID" not in row[0].upper():
+        _migrate_to_without_rowid(conn)
+
+    # Covering index for all aggregation/sync queries that filter by timestamp range:
+    # the rollup queries group by mac/app_name and sum rx/tx straight from the index.
+    # It supersedes the plain timestamp index.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_traffic_ts_mac_app ON traffic(timestamp, mac, app_name, rx, tx);")
+    cursor.execute("DROP INDEX IF EXISTS idx_traffic_timestamp;")
 
     conn.commit()
-    conn.close()
+    _close(conn)
+    _initialized_paths.add(db_path)
+
+def _integrity_check(db_path):
+    """
+    Runs PRAGMA quick_check on db_path and returns the first result ("ok" when healthy).
+    Uses its own connection, never the cached reader, which may still hold
+    pages from before the file was damaged. The large mmap window and page
+    cache let the scan read pages without a read() call each.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.execute("PRAGMA cache_size = -32000")
+        row = conn.execute("PRAGMA quick_check").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
 
-def check_db_integrity():
+def check_db_integrity(db_path=None):
     """
     Checks the integrity of the SQLite database using PRAGMA quick_check.
+    db_path defaults to the database get_db_connection() reads.
     Returns True if database is healthy, False if corrupted or missing.
     """
+    if db_path is None:
+        db_path = _db_path()
     try:
         # Check if database file exists
-        if not os.path.exists(Config.LIVE_DB_PATH):
-            print(f"Database file not found: {Config.LIVE_DB_PATH}")
+        if not os.path.exists(db_path):
+            logger.warning("Database file not found: %s", db_path)
             return False
             
-        # Try to connect and run integrity check
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Run SQLite's built-in integrity check
-        cursor.execute("PRAGMA quick_check;")
-        result = cursor.fetchone()
-        
-        conn.close()
+        result = _integrity_check(db_path)
         
         # Check if integrity is OK
-        if result and result[0] == "ok":
+        if result == "ok":
             return True
         else:
-            print(f"Database integrity check failed: {result}")
+            logger.error("Database integrity check failed: %s", result)
             return False
     except sqlite3.DatabaseError as e:
-        print(f"Database error during integrity check: {e}")
+        logger.error("Database error during integrity check: %s", e)
         return False
     except Exception as e:
-        print(f"Unexpected error during integrity check: {e}")
+        logger.error("Unexpected error during integrity check: %s", e)
         return False
 
 def restore_db_from_backup(backup_path=None):
     """
     Restores the database from a backup file.
     If backup_path is None, uses the most recent backup.
-    Supports both compressed (.db.gz) and uncompressed (.db) files.
+    Supports compressed (.db.zst, .db.gz) and uncompressed (.db) files.
     Returns True if successful, False otherwise.
     """
+    # History lines are collected here and appended to the log in one write
+    restore_log = os.path.join(Config.LOGS_DIR, "db_restore_history.log")
+    log_lines = []
     try:
         # Ensure logs directory exists
         os.makedirs(Config.LOGS_DIR, exist_ok=True)
@@ -178,105 +419,131 @@ def restore_db_from_backup(backup_path=None):
         if backup_path is None:
             # Find the most recent backup
             if not os.path.exists(Config.DB_BACKUPS_DIR):
-                print(f"Backup directory not found: {Config.DB_BACKUPS_DIR}")
+                logger.error("Backup directory not found: %s", Config.DB_BACKUPS_DIR)
                 return False
 
-            # Find all backup files (both compressed and uncompressed)
-            backup_files = glob.glob(os.path.join(Config.DB_BACKUPS_DIR, "TrafficAnalyzer_*.db.gz"))
-            backup_files.extend(glob.glob(os.path.join(Config.DB_BACKUPS_DIR, "TrafficAnalyzer_*.db")))
+            # Pick the newest backup (compressed or uncompressed) in one scandir pass
+            backup_path = None
+            newest_mtime = -1
+            with os.scandir(Config.DB_BACKUPS_DIR) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if not name.startswith("TrafficAnalyzer_"):
+                        continue
+                    if not name.endswith((".db", ".db.gz", ".db.zst")):
+                        continue
+                    mtime = entry.stat().st_mtime
+                    if mtime > newest_mtime:
+                        newest_mtime = mtime
+                        backup_path = entry.path
 
-            if not backup_files:
-                print("No database backups found.")
+            if backup_path is None:
+                logger.error("No database backups found.")
                 return False
 
-            # Sort by modification time (newest first)
-            backup_files.sort(key=os.path.getmtime, reverse=True)
-
-            # Get the most recent backup
-            backup_path = backup_files[0]
-
         # Validate the backup file exists
         if not os.path.exists(backup_path):
-            print(f"Backup file not found: {backup_path}")
+            logger.error("Backup file not found: %s", backup_path)
             return False
 
-        print(f"Restoring database from backup: {os.path.basename(backup_path)}")
+        logger.info("Restoring database from backup: %s", os.path.basename(backup_path))
 
         # Determine if file is compressed
-        is_compressed = backup_path.endswith('.db.gz')
+        is_zstd = backup_path.endswith('.db.zst')
+        is_compressed = is_zstd or backup_path.endswith('.db.gz')
         
         # Log the corruption event
-        restore_log = os.path.join(Config.LOGS_DIR, "db_restore_history.log")
         corruption_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with open(restore_log, "a") as f:
-            f.write(f"[{corruption_timestamp}] DETECTED: TrafficAnalyzer.db is missing/corrupt\n")
+        log_lines.append(f"[{corruption_timestamp}] DETECTED: TrafficAnalyzer.db is missing/corrupt\n")
         
-        # Extract the backup
-        import subprocess
+        # Extract the backup in-process
+        import gzip
         # Restore to the local traffic.db file, not the live database
         temp_db_path = Config.LOCAL_DB_PATH + ".tmp"
+        if os.path.exists(temp_db_path):
+            os.remove(temp_db_path)
 
         # Handle compressed or uncompressed files
         if is_compressed:
             # Decompress the backup
-            with open(temp_db_path, "wb") as temp_db_file:
-                result = subprocess.run(
-                    ["gunzip", "-c", backup_path],
-                    stdout=temp_db_file,
-                    stderr=subprocess.PIPE
-                )
-
-            if result.returncode != 0:
-                print(f"Failed to decompress backup: {result.stderr.decode()}")
+            decompress_error = None
+            if is_zstd:
+                # zstd has no stdlib module; use the CLI when it is installed
+                decoder = ["zstd", "-dcq"] if shutil.which("zstd") else None
+                if decoder is None:
+                    decompress_error = "zstd is not installed"
+            else:
+                # pigz decodes with separate read/write/check threads; the gzip
+                # module below is the fallback when it isn't installed
+                decoder = ["pigz", "-dc"] if shutil.which("pigz") else None
+
+            if decoder is not None:
+                import subprocess
+                with open(temp_db_path, "wb") as dst:
+                    result = subprocess.run(decoder + [backup_path], stdout=dst, stderr=subprocess.DEVNULL)
+                if result.returncode != 0:
+                    decompress_error = f"{decoder[0]} exited with status {result.returncode}"
+            elif not is_zstd:
+                try:
+                    with gzip.open(backup_path, "rb") as src, open(temp_db_path, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                except (OSError, EOFError) as e:
+                    decompress_error = e
+
+            if decompress_error is not None:
+                logger.error("Failed to decompress backup: %s", decompress_error)
                 if os.path.exists(temp_db_path):
                     os.remove(temp_db_path)
-                with open(restore_log, "a") as f:
-                    f.write(f"[{corruption_timestamp}] FAILED: Could not decompress {os.path.basename(backup_path)}\n")
+                log_lines.append(f"[{corruption_timestamp}] FAILED: Could not decompress {os.path.basename(backup_path)}\n")
                 return False
         else:
-            # Copy uncompressed file directly
-            shutil.copy2(backup_path, temp_db_path)
+            # Copy uncompressed file page by page through SQLite's backup API
+            from urllib.parse import quote
+            src_conn = sqlite3.connect(f"file:{quote(os.path.abspath(backup_path))}?mode=ro", uri=True)
+            try:
+                dst_conn = sqlite3.connect(temp_db_path)
+                try:
+                    src_conn.backup(dst_conn)
+                finally:
+                    dst_conn.close()
+            finally:
+                src_conn.close()
             
         # Check integrity of restored database
-        temp_config = Config
-        temp_config.LIVE_DB_PATH = temp_db_path
+        try:
+            restored_ok = _integrity_check(temp_db_path) == "ok"
+        except sqlite3.Error:
+            restored_ok = False
         
-        # Create a temporary function to check integrity of the restored DB
-        def check_temp_db_integrity(db_path):
-            try:
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-                cursor.execute("PRAGMA quick_check;")
-                result = cursor.fetchone()
-                conn.close()
-                return result and result[0] == "ok"
-            except Exception:
-                return False
-        
-        if not check_temp_db_integrity(temp_db_path):
-            print("Restored database is corrupted. Cannot restore.")
+        if not restored_ok:
+            logger.error("Restored database is corrupted. Cannot restore.")
             os.remove(temp_db_path)
-            with open(restore_log, "a") as f:
-                f.write(f"[{corruption_timestamp}] FAILED: Restored database {os.path.basename(backup_path)} is corrupted\n")
+            log_lines.append(f"[{corruption_timestamp}] FAILED: Restored database {os.path.basename(backup_path)} is corrupted\n")
             return False
             
         # Backup the corrupted database if it exists
         # Backup the local traffic.db file, not the live database
         if os.path.exists(Config.LOCAL_DB_PATH):
             corrupted_backup = Config.LOCAL_DB_PATH + ".corrupted." + datetime.now().strftime("%Y%m%d_%H%M%S")
-            shutil.move(Config.LOCAL_DB_PATH, corrupted_backup)
-            print(f"Corrupted database backed up to: {corrupted_backup}")
+            os.replace(Config.LOCAL_DB_PATH, corrupted_backup)
+            # The WAL/shm files belong to the corrupted database; left in place
+            # they would be replayed on top of the restored one
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(Config.LOCAL_DB_PATH + suffix):
+                    os.replace(Config.LOCAL_DB_PATH + suffix, corrupted_backup + suffix)
+            logger.info("Corrupted database backed up to: %s", corrupted_backup)
             
         # Move the restored database to the correct location
-        # Restore to the local traffic.db file
-        shutil.move(temp_db_path, Config.LOCAL_DB_PATH)
-        os.chmod(Config.LOCAL_DB_PATH, 0o600)  # Set proper permissions
+        # Restore to the local traffic.db file. The temp file sits next to it,
+        # so this is a single atomic rename; permissions are set beforehand so
+        # the live path never exists with the wrong mode.
+        os.chmod(temp_db_path, 0o600)  # Set proper permissions
+        os.replace(temp_db_path, Config.LOCAL_DB_PATH)
         
         # Log the successful restoration
         restore_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with open(restore_log, "a") as f:
-            f.write(f"[{restore_time}] RESTORED: Successfully restored from {os.path.basename(backup_path)}\n")
-            f.write(f"[{restore_time}] TIME GAP: DB was unavailable between {corruption_timestamp} and {restore_time}\n")
+        log_lines.append(f"[{restore_time}] RESTORED: Successfully restored from {os.path.basename(backup_path)}\n")
+        log_lines.append(f"[{restore_time}] TIME GAP: DB was unavailable between {corruption_timestamp} and {restore_time}\n")
 
         # Create marker for dashboard
         last_restore_info = f"{corruption_timestamp}|{restore_time}|{os.path.basename(backup_path)}"
@@ -284,16 +551,21 @@ def restore_db_from_backup(backup_path=None):
         with open(last_restore_file, "w") as f:
             f.write(last_restore_info)
             
-        print("Database successfully restored from backup.")
+        logger.info("Database successfully restored from backup.")
         return True
     except Exception as e:
-        print(f"Error restoring database from backup: {e}")
+        logger.error("Error restoring database from backup: %s", e)
         # Log the failure
-        restore_log = os.path.join(Config.LOGS_DIR, "db_restore_history.log")
         corruption_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with open(restore_log, "a") as f:
-            f.write(f"[{corruption_timestamp}] CRITICAL: Exception during restore process: {e}\n")
+        log_lines.append(f"[{corruption_timestamp}] CRITICAL: Exception during restore process: {e}\n")
         return False
+    finally:
+        if log_lines:
+            try:
+                with open(restore_log, "a") as f:
+                    f.writelines(log_lines)
+            except OSError as e:
+                logger.warning("Could not write restore history: %s", e)
 
 # Global flag to enable/disable self-healing
 SELF_HEALING_ENABLED = False
@@ -312,31 +584,26 @@ def ensure_healthy_database():
     os.makedirs(Config.LOGS_DIR, exist_ok=True)
     
     # When running on a router, check the local traffic.db file instead of the live database
-    original_live_db_path = Config.LIVE_DB_PATH
+    db_path = None
     if os.path.exists(Config.ROUTER_DB_PATH) and Config.LOCAL_DB_PATH != Config.ROUTER_DB_PATH:
-        # Temporarily set LIVE_DB_PATH to the local traffic.db for health check
-        Config.LIVE_DB_PATH = Config.LOCAL_DB_PATH
+        db_path = Config.LOCAL_DB_PATH
     
-    try:
-        if not check_db_integrity():
-            print("Database integrity check failed. Attempting to restore from backup...")
-            
-            if restore_db_from_backup():
-                # Verify integrity after restoration
-                if check_db_integrity():
-                    print("Database successfully restored and verified.")
-                    return True
-                else:
-                    print("Database restored but still failing integrity check.")
-                    return False
+    if not check_db_integrity(db_path):
+        logger.warning("Database integrity check failed. Attempting to restore from backup...")
+        
+        if restore_db_from_backup():
+            # Verify integrity after restoration
+            if check_db_integrity(db_path):
+                logger.info("Database successfully restored and verified.")
+                return True
             else:
-                print("Failed to restore database from backup.")
+                logger.error("Database restored but still failing integrity check.")
                 return False
         else:
-            return True
-    finally:
-        # Restore the original LIVE_DB_PATH
-        Config.LIVE_DB_PATH = original_live_db_path
+            logger.error("Failed to restore database from backup.")
+            return False
+    else:
+        return True
 
 def import_history_from_router():
     """
@@ -344,48 +611,21 @@ def import_history_from_router():
     This is a one-time operation to populate traffic.db with all existing data.
     """
     try:
-        # Connect to both databases
-        router_conn = get_router_db_connection()
-        if not router_conn:
-            print("Router database not found. Skipping import.")
+        if not os.path.exists(Config.ROUTER_DB_PATH):
+            logger.warning("Router database not found. Skipping import.")
             return False
             
-        # Set router connection to read-only mode to prevent any writes
-        router_conn.execute("PRAGMA query_only = ON")
-            
-        local_conn = get_local_traffic_db_connection()
-        
-        print("Importing all historical data from router database...")
+        logger.info("Importing all historical data from router database...")
         
-        # Get all records from router database
-        router_cursor = router_conn.cursor()
-        router_cursor.execute("""
-            SELECT mac, app_name, cat_name, timestamp, tx, rx
-            FROM traffic 
-            ORDER BY timestamp
-        """)
-        
-        records = router_cursor.fetchall()
-        print(f"Found {len(records)} total records to import")
+        # Copy all records from router database
+        inserted_count = _copy_from_router(_IMPORT_SQL, bulk=True)
         
-        if records:
-            # Insert records into local database, ignoring duplicates
-            local_cursor = local_conn.cursor()
-            local_cursor.executemany("""
-                INSERT OR IGNORE INTO traffic (mac, app_name, cat_name, timestamp, tx, rx) 
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, records)
-            local_conn.commit()
-            inserted_count = local_cursor.rowcount
-            print(f"Successfully imported {inserted_count} new records")
+        if inserted_count:
+            logger.info("Successfully imported %d new records", inserted_count)
         else:
-            print("No records to import")
-            
-        # Close connections
-        router_conn.close()
-        local_conn.close()
+            logger.info("No records to import")
         
         return True
     except Exception as e:
-        print(f"Error importing data from router: {e}")
+        logger.error("Error importing data from router: %s", e)
         return False
\ No newline at end of file
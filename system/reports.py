@@ -1,8 +1,16 @@
 import os
 import json
 import re
+import heapq
+from operator import itemgetter
 from datetime import datetime, timedelta
+from functools import lru_cache
 from .config import Config
+try:
+    # Optional: much faster JSON encoder/decoder, not installed by install.sh
+    import orjson
+except ImportError:
+    orjson = None
 from .database import get_db_connection, ensure_healthy_database
 from .utils import bytes_to_gb, get_date_range, get_all_device_names, get_device_name
 
@@ -10,18 +18,9 @@ from .utils import bytes_to_gb, get_date_range, get_all_device_names, get_device
 # This enables automated notification rules to fire during each monitor run
 from .notify import evaluate_rules, get_known_macs_from_db
 
-def get_appropriate_quota(start_date_str, end_date_str):
-    """
-    Determines the appropriate quota type based on the period length.
-    Returns the quota value and type identifier for dashboard display.
-
-    Args:
-        start_date_str (str): Start date in YYYY-MM-DD format
-        end_date_str (str): End date in YYYY-MM-DD format
-
-    Returns:
-        tuple: (quota_value, quota_type) where quota_type is 'daily', 'weekly', or 'monthly'
-    """
+@lru_cache(maxsize=256)
+def _quota_type_for_period(start_date_str, end_date_str):
+    """Classifies a period as 'daily', 'weekly' or 'monthly'. Pure, so results are memoized."""
     try:
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
         end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
@@ -34,27 +33,78 @@ def get_appropriate_quota(start_date_str, end_date_str):
 
         # For periods starting from the 1st (month-to-date views), use monthly quota
         if is_month_start_to_date:
-            return Config.MONTHLY_QUOTA_GB, "monthly"
+            return "monthly"
         elif days_in_period == 1:
-            return Config.DAILY_QUOTA_GB, "daily"
+            return "daily"
         elif days_in_period <= 7:
-            return Config.WEEKLY_QUOTA_GB, "weekly"
+            return "weekly"
         else:
-            return Config.MONTHLY_QUOTA_GB, "monthly"
+            return "monthly"
     except Exception:
-        # Fallback to monthly quota if date parsing fails or quota attribute doesn't exist
-        return Config.MONTHLY_QUOTA_GB, "monthly"
+        # Fallback to monthly quota if date parsing fails
+        return "monthly"
+
+def get_appropriate_quota(start_date_str, end_date_str):
+    """
+    Determines the appropriate quota type based on the period length.
+    Returns the quota value and type identifier for dashboard display.
+
+    Args:
+        start_date_str (str): Start date in YYYY-MM-DD format
+        end_date_str (str): End date in YYYY-MM-DD format
+
+    Returns:
+        tuple: (quota_value, quota_type) where quota_type is 'daily', 'weekly', or 'monthly'
+    """
+    quota_type = _quota_type_for_period(start_date_str, end_date_str)
+    # The quota values are read on every call so edited settings still apply
+    try:
+        if quota_type == "daily":
+            return Config.DAILY_QUOTA_GB, quota_type
+        if quota_type == "weekly":
+            return Config.WEEKLY_QUOTA_GB, quota_type
+    except AttributeError:
+        pass # Fallback to monthly quota if the quota attribute doesn't exist
+    return Config.MONTHLY_QUOTA_GB, "monthly"
+
+# Quota settings are edited in place by the dashboard, which makes existing reports stale
+_CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'config.py')
+
+_GENERIC_APP_NAMES = frozenset({"QUIC", "SSL/TLS", "General", "HTTP Protocol over TLS SSL"})
 
 def rename_app(app_name):
     """
     Helper function to rename/group common, generic traffic types,
     mimicking the logic from the old get_device_apps.sh script.
     """
-    generic_names = {"QUIC", "SSL/TLS", "General", "HTTP Protocol over TLS SSL"}
-    if app_name in generic_names:
+    if app_name in _GENERIC_APP_NAMES:
         return "Other Sources"
     return app_name
 
+def _write_report_json(filepath, data):
+    """Writes a daily/period report file, encoding with orjson when it is installed."""
+    pretty = Config.PRETTY_REPORT_JSON
+    encoded = None
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None)
+        except TypeError:
+            pass # Types orjson can't handle fall back to the stdlib encoder
+    if encoded is None:
+        if pretty:
+            encoded = json.dumps(data, indent=2).encode('utf-8')
+        else:
+            encoded = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    # Encode up front and hand the whole buffer to os.write instead of letting
+    # json.dump push hundreds of small chunks through a buffered text file.
+    view = memoryview(encoded)
+    fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
 def create_daily_rollup(date_str):
     """
     Creates a single, immutable JSON file for a given calendar day.
@@ -69,14 +119,6 @@ def create_daily_rollup(date_str):
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Overall stats
-        cursor.execute("""
-            SELECT SUM(rx), SUM(tx), SUM(rx+tx) FROM traffic
-            WHERE timestamp >= ? AND timestamp < ?
-        """, (day_start_ts, day_end_ts))
-        stats_row = cursor.fetchone()
-        dl_bytes, ul_bytes, total_bytes = stats_row if stats_row and stats_row[0] is not None else (0, 0, 0)
-
         # Per-device stats
         cursor.execute("""
             SELECT mac, SUM(rx), SUM(tx), SUM(rx+tx) FROM traffic
@@ -85,6 +127,11 @@ def create_daily_rollup(date_str):
         """, (day_start_ts, day_end_ts))
         devices_rows = cursor.fetchall()
 
+        # Overall stats are the sum of the per-device rows, no second scan needed
+        dl_bytes = sum(row[1] or 0 for row in devices_rows)
+        ul_bytes = sum(row[2] or 0 for row in devices_rows)
+        total_bytes = sum(row[3] or 0 for row in devices_rows)
+
         # Per-device app usage
         cursor.execute("""
             SELECT mac, app_name, SUM(rx+tx) as total FROM traffic
@@ -93,18 +140,13 @@ def create_daily_rollup(date_str):
         """, (day_start_ts, day_end_ts))
         device_apps_rows = cursor.fetchall()
         
-        device_app_map = {}
+        device_app_map = {}  # {mac: {renamed_app_name: total_bytes}}
         for mac, app_name, total in device_apps_rows:
             # Apply rename logic during daily aggregation to group common traffic types
             renamed_app_name = rename_app(app_name)
-            if mac not in device_app_map:
-                device_app_map[mac] = []
             # Aggregate apps with the same renamed name
-            existing_app = next((item for item in device_app_map[mac] if item["name"] == renamed_app_name), None)
-            if existing_app:
-                existing_app["total_bytes"] += total
-            else:
-                device_app_map[mac].append({"name": renamed_app_name, "total_bytes": total})
+            apps = device_app_map.setdefault(mac, {})
+            apps[renamed_app_name] = apps.get(renamed_app_name, 0) + total
 
         # Top apps overall - Keep original names for main dashboard, don't group them
         cursor.execute("""
@@ -114,18 +156,18 @@ def create_daily_rollup(date_str):
         """, (day_start_ts, day_end_ts))
         top_apps_rows = cursor.fetchall()
 
-        # Hourly aggregation for single-day detailed views (Optimized to use a single query)
+        # Hourly aggregation for single-day detailed views, bucketed by SQLite (at most 25 rows)
         hourly_values = [0] * 24
         cursor.execute("""
-            SELECT timestamp, rx, tx FROM traffic
+            SELECT (timestamp - ?) / 3600 AS hour_index, SUM(rx+tx) FROM traffic
             WHERE timestamp >= ? AND timestamp < ?
-        """, (day_start_ts, day_end_ts))
+            GROUP BY hour_index
+        """, (day_start_ts, day_start_ts, day_end_ts))
         
-        for ts, rx, tx in cursor.fetchall():
-            # Calculate which hour bucket the record falls into
-            hour_index = (ts - day_start_ts) // 3600
+        for hour_index, hour_total in cursor.fetchall():
+            # A 25-hour DST day yields one extra bucket, which is dropped as before
             if 0 <= hour_index < 24:
-                hourly_values[hour_index] += (rx + tx)
+                hourly_values[hour_index] = hour_total
 
         conn.close()
 
@@ -144,44 +186,65 @@ def create_daily_rollup(date_str):
                 "ul_bytes": ul,
                 "total_bytes": total,
                 "percentage": percentage,
-                "topApps": sorted(device_app_map.get(mac, []), key=lambda x: x['total_bytes'], reverse=True)
+                "topApps": sorted(
+                    ({"name": name, "total_bytes": app_total} for name, app_total in device_app_map.get(mac, {}).items()),
+                    key=lambda x: x['total_bytes'], reverse=True
+                )
             })
 
         # --- ENHANCE: Add 30-day context metrics and anomaly for single-day views ---
         # Fixes #7: Load all 30 files once into lookup dict → O(30) instead of O(devices × 30)
-        thirty_days_ago = (datetime.strptime(date_str, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
-        thirty_files = [os.path.join(Config.DAILY_DIR, f"{d}.json") for d in get_date_range(thirty_days_ago, date_str)]
+        # The window's last day is date_str itself: its totals come from the queries
+        # above rather than from the (stale or not yet written) file being replaced
+        thirty_days_ago = (day_start - timedelta(days=30)).strftime('%Y-%m-%d')
+        day_before = (day_start - timedelta(days=1)).strftime('%Y-%m-%d')
+        thirty_files = [os.path.join(Config.DAILY_DIR, f"{d}.json") for d in get_date_range(thirty_days_ago, day_before)]
         
-        # Load all 30 files ONCE into a lookup dict, then attach per-device data from memory
-        device_30_lookup = {}  # {mac: [{date: str, total_bytes: int}, ...]}
+        # Load all 30 files ONCE and fold each device's days into running totals,
+        # so attaching the 30-day metrics below is a single dict lookup per device
+        device_30_lookup = {}  # {mac: [total_bytes, peak_date, peak_bytes]}
         valid_file_count = 0
         for f in thirty_files:
-            if os.path.exists(f) and os.path.getsize(f) > 0:
-                try:
-                    with open(f, 'r') as fp:
-                        d = json.load(fp)
-                        date_label = d['barChart']['labels'][0]
-                        for dev in d.get('devices', []):
-                            mac = dev.get('mac')
-                            if mac not in device_30_lookup:
-                                device_30_lookup[mac] = []
-                            device_30_lookup[mac].append({
-                                "date": date_label,
-                                "total_bytes": dev.get('total_bytes', 0)
-                            })
-                except (json.JSONDecodeError, KeyError):
-                    continue  # Skip corrupted or incomplete files
-                valid_file_count += 1
+            try:
+                d = _load_daily(f)
+                if d is None:
+                    continue
+                date_label = d['barChart']['labels'][0]
+                for dev in d.get('devices', []):
+                    mac = dev.get('mac')
+                    day_bytes = dev.get('total_bytes', 0)
+                    acc = device_30_lookup.get(mac)
+                    if acc is None:
+                        device_30_lookup[mac] = [day_bytes, date_label, day_bytes]
+                    else:
+                        acc[0] += day_bytes
+                        if day_bytes > acc[2]:
+                            acc[1] = date_label
+                            acc[2] = day_bytes
+            except (json.JSONDecodeError, KeyError):
+                continue  # Skip corrupted or incomplete files
+            valid_file_count += 1
+
+        for device in devices_list:
+            day_bytes = device['total_bytes']
+            acc = device_30_lookup.get(device['mac'])
+            if acc is None:
+                device_30_lookup[device['mac']] = [day_bytes, date_str, day_bytes]
+            else:
+                acc[0] += day_bytes
+                if day_bytes > acc[2]:
+                    acc[1] = date_str
+                    acc[2] = day_bytes
+        valid_file_count += 1
         
         # Now attach 30-day data to each device from lookup (no more file scanning per device)
         for device in devices_list:
-            device_30_data = device_30_lookup.get(device['mac'], [])
+            device_30_data = device_30_lookup.get(device['mac'])
             if device_30_data and valid_file_count >= 7:
                 # Has enough 30-day data — calculate averages and peak
-                device_30_total = sum(d['total_bytes'] for d in device_30_data)
+                device_30_total, peak_date, peak_bytes = device_30_data
                 device['avg_daily_gb'] = bytes_to_gb(device_30_total) / valid_file_count
-                peak_30 = max(device_30_data, key=lambda x: x['total_bytes'])
-                device['peak_day'] = {"date": peak_30['date'], "gb": bytes_to_gb(peak_30['total_bytes'])}
+                device['peak_day'] = {"date": peak_date, "gb": bytes_to_gb(peak_bytes)}
                 # Anomaly detection: warn if today's usage > threshold
                 total_gb = bytes_to_gb(device['total_bytes'])
                 device['recent_vs_avg_percent'] = 999 if total_gb > Config.DEVICE_HIGH_USAGE_ALERT_GB else 0
@@ -217,44 +280,253 @@ def create_daily_rollup(date_str):
         rollup_data["stats_bytes"]["quotaType"] = quota_type
 
         filepath = os.path.join(Config.DAILY_DIR, f"{date_str}.json")
-        with open(filepath, 'w') as f:
-            json.dump(rollup_data, f, indent=2)
+        _write_report_json(filepath, rollup_data)
         return True
     except Exception as e:
         print(f"Error creating daily rollup for {date_str}: {e}")
         return False
 
-def build_period_report(start_date_str, end_date_str, output_filename=None):
+@lru_cache(maxsize=64)
+def _parse_json_file(filepath, mtime_ns, size):
+    """Parses a JSON report file. mtime_ns/size are part of the cache key only."""
+    with open(filepath, 'rb') as fp:
+        raw = fp.read()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+@lru_cache(maxsize=64)
+def _index_devices(filepath, mtime_ns, size):
+    """Maps mac -> device entry of a parsed report file, keeping the first entry per mac."""
+    index = {}
+    for device in _parse_json_file(filepath, mtime_ns, size).get('devices', []):
+        index.setdefault(device['mac'], device)
+    return index
+
+def _file_cache_key(filepath):
+    """Returns the (path, mtime_ns, size) cache key of a non-empty file, or None."""
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    if st.st_size == 0:
+        return None
+    return (filepath, st.st_mtime_ns, st.st_size)
+
+def _load_daily(filepath):
+    """
+    Returns the parsed contents of a daily (or period) JSON file, or None if it
+    is missing or empty. Results are cached until the file changes, so callers
+    must treat them as read-only.
+    """
+    key = _file_cache_key(filepath)
+    return _parse_json_file(*key) if key is not None else None
+
+def _load_device_index(filepath):
+    """Like _load_daily, but returns the file's {mac: device} index. Read-only as well."""
+    key = _file_cache_key(filepath)
+    return _index_devices(*key) if key is not None else None
+
+def _device_apps_from_file(filepath, mac):
+    """Returns {"apps": ...} for mac from a report file, or None if the file is missing or empty."""
+    devices = _load_device_index(filepath)
+    if devices is None:
+        return None
+    device = devices.get(mac)
+    return {"apps": device.get('topApps', []) if device is not None else []}
+
+def _load_daily_files(paths, warn_missing=False):
+    """Loads the non-empty daily rollups among paths, in order."""
+    daily_data = []
+    for f in paths:
+        d = _load_daily(f)
+        if d is not None:
+            daily_data.append(d)
+        elif warn_missing:
+            print(f"WARNING: Skipping empty or missing daily file: {f}")
+    return daily_data
+
+def _aggregate_period(daily_data):
+    """
+    Sums overall stats, per-device bytes/daily traffic/apps, top apps and bar chart
+    values across daily rollups in a single pass over daily_data.
+    This is the hot loop of period reports, so lookups are hoisted into locals.
+    """
+    dl_total = ul_total = traffic_total = 0
+    all_devices = {}
+    all_top_apps = {}
+    bar_labels = []
+    bar_values = []
+    get_device = all_devices.get
+    get_top_app = all_top_apps.get
+    generic_names = _GENERIC_APP_NAMES
+    for d in daily_data:
+        stats = d.get('stats_bytes', {})
+        dl_total += stats.get('dl_bytes', 0)
+        ul_total += stats.get('ul_bytes', 0)
+        traffic_total += stats.get('total_bytes', 0)
+
+        bar_chart = d['barChart']
+        date = bar_chart['labels'][0]
+        bar_labels.append(date)
+        bar_values.append(bar_chart.get('values_bytes', [0])[0])
+
+        for device in d.get('devices', []):
+            mac = device['mac']
+            entry = get_device(mac)
+            if entry is None:
+                entry = all_devices[mac] = {"mac": mac, "name": device['name'], "dl_bytes": 0, "ul_bytes": 0, "total_bytes": 0, "daily_dates": [], "daily_totals": [], "topApps": {}}
+
+            device_total = device.get('total_bytes', 0)
+            entry['dl_bytes'] += device.get('dl_bytes', 0)
+            entry['ul_bytes'] += device.get('ul_bytes', 0)
+            entry['total_bytes'] += device_total
+            entry['daily_dates'].append(date)
+            entry['daily_totals'].append(device_total)
+
+            # Aggregate individual device top apps for "Top 3 Apps (Period)" in Personalized Usage Summary
+            apps = entry['topApps']
+            get_app = apps.get
+            for app in device.get('topApps', []):
+                # Same grouping as rename_app(), inlined since this runs per device, per app, per day
+                app_name = app['name']
+                if app_name in generic_names:
+                    app_name = "Other Sources"
+                apps[app_name] = get_app(app_name, 0) + app.get('total_bytes', 0)
+
+        # Overall top apps keep their original names
+        for app in d.get('topApps', []):
+            name = app['name']
+            all_top_apps[name] = get_top_app(name, 0) + app.get('total_bytes', 0)
+
+    return (dl_total, ul_total, traffic_total), all_devices, all_top_apps, bar_labels, bar_values
+
+def _single_day_period_report(day, date_str):
+    """
+    Re-shapes one daily rollup into the period report format. The rollup already
+    carries per-device percentages, 30-day averages/peaks and grouped top apps, so
+    only filtering, trimming and the anomaly flag are left to do here.
+    Returns None for rollups missing the per-device metrics (older file format).
+    """
+    devices = []
+    for device in day.get('devices', []):
+        if 'peak_day' not in device or 'avg_daily_gb' not in device:
+            return None
+        if device['total_bytes'] < 5368709: # Filter insignificant devices
+            continue
+        device = dict(device)
+        device['trend_bytes'] = [device['total_bytes']]
+        # Single-day threshold check, using the current setting rather than the one at rollup time
+        total_gb = bytes_to_gb(device['total_bytes'])
+        device['recent_vs_avg_percent'] = 999 if total_gb > Config.DEVICE_HIGH_USAGE_ALERT_GB else 0
+        device['topApps'] = device.get('topApps', [])[:5]
+        devices.append(device)
+
+    quota_value, quota_type = get_appropriate_quota(date_str, date_str)
+    stats = day.get('stats_bytes', {})
+    bar_chart = day['barChart']
+    return {
+        "stats_bytes": {
+            "dl_bytes": stats.get('dl_bytes', 0),
+            "ul_bytes": stats.get('ul_bytes', 0),
+            "total_bytes": stats.get('total_bytes', 0),
+            "devices_count": len(devices),
+            "quotaGB": quota_value,
+            "quotaType": quota_type
+        },
+        "devices": devices,
+        "barChart": {
+            "labels": [bar_chart['labels'][0]],
+            "values_bytes": [bar_chart.get('values_bytes', [0])[0]],
+            "title": f"Daily Traffic ({date_str} to {date_str})",
+            "hourly_values_bytes": bar_chart.get('hourly_values_bytes'),
+            "hourly_labels": bar_chart.get('hourly_labels')
+        },
+        "topApps": day.get('topApps', [])[:10]
+    }
+
+def _rollup_newer_than_window(rollup_path, date_str):
+    """
+    True if the daily rollup at rollup_path was written after every existing daily
+    file in the 30 days before date_str, so the averages and peaks it carries still
+    match those files.
+    """
+    try:
+        rollup_mtime_ns = os.stat(rollup_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    thirty_days_ago = (datetime.strptime(date_str, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
+    for d in get_date_range(thirty_days_ago, date_str):
+        if d == date_str:
+            continue
+        try:
+            # Strictly older only: coarse (1 s) mtimes can't order writes within the same tick
+            if os.stat(os.path.join(Config.DAILY_DIR, f"{d}.json")).st_mtime_ns >= rollup_mtime_ns:
+                return False
+        except FileNotFoundError:
+            continue
+    return True
+
+def _ensure_daily_rollups(start_date_str, end_date_str):
+    """Creates any missing daily rollups in the period and returns the period's daily file paths."""
+    date_range = list(get_date_range(start_date_str, end_date_str))
+    all_files = [os.path.join(Config.DAILY_DIR, f"{d}.json") for d in date_range]
+    total_days = len(date_range)
+
+    created_count = 0
+    for dt_str, filepath in zip(date_range, all_files):
+        if not os.path.exists(filepath):
+            create_daily_rollup(dt_str)
+            created_count += 1
+            # Show progress more frequently for better UX
+            if total_days > 10 and (created_count % 5 == 0 or created_count == total_days):
+                progress_pct = int((created_count / total_days) * 100) if total_days > 0 else 0
+                print(f"Progress: {created_count}/{total_days} daily rollups generated ({progress_pct}%)...")
+
+    if created_count > 0:
+        print(f"✅ Completed: Generated {created_count} daily rollups for period {start_date_str} to {end_date_str}")
+    return all_files
+
+def _load_fresh_period_report(output_path, start_date_str, end_date_str):
+    """
+    Returns the existing report at output_path if it was written after config.py
+    (quotas) and every daily rollup in the period last changed, else None. A missing
+    rollup makes the report stale, since building it would create that rollup.
+    """
+    key = _file_cache_key(output_path)
+    if key is None:
+        return None
+    output_mtime_ns = key[1]
+    sources = [_CONFIG_FILE]
+    sources.extend(os.path.join(Config.DAILY_DIR, f"{d}.json") for d in get_date_range(start_date_str, end_date_str))
+    for path in sources:
+        try:
+            # Strictly older only: coarse (1 s) mtimes can't order writes within the same tick
+            if os.stat(path).st_mtime_ns >= output_mtime_ns:
+                return None
+        except FileNotFoundError:
+            return None
+    return _parse_json_file(*key)
+
+def build_period_report(start_date_str, end_date_str, output_filename=None, force=False):
     """
     Builds a report for a given period by aggregating daily files.
     This replaces period_builder.sh and now handles all GB conversions.
+    Unless force is set, an existing multi-day report newer than all of its inputs
+    is returned as is (read-only, like _load_daily) instead of being rebuilt.
     """
     try:
-        date_range = list(get_date_range(start_date_str, end_date_str))
-        all_files = [os.path.join(Config.DAILY_DIR, f"{d}.json") for d in date_range]
-        total_days = len(date_range)
-
-        created_count = 0
-        for i, dt_str in enumerate(date_range, 1):
-            filepath = os.path.join(Config.DAILY_DIR, f"{dt_str}.json")
-            if not os.path.exists(filepath):
-                create_daily_rollup(dt_str)
-                created_count += 1
-                # Show progress more frequently for better UX
-                if total_days > 10 and (created_count % 5 == 0 or created_count == total_days):
-                    progress_pct = int((created_count / total_days) * 100) if total_days > 0 else 0
-                    print(f"Progress: {created_count}/{total_days} daily rollups generated ({progress_pct}%)...")
-
-        if created_count > 0:
-            print(f"✅ Completed: Generated {created_count} daily rollups for period {start_date_str} to {end_date_str}")
-
-        daily_data = []
-        for f in all_files:
-            if os.path.exists(f) and os.path.getsize(f) > 0:
-                with open(f, 'r') as fp:
-                    daily_data.append(json.load(fp))
-            else:
-                print(f"WARNING: Skipping empty or missing daily file: {f}")
+        filename = output_filename or f"traffic_period_{start_date_str}-{end_date_str}.json"
+        output_path = os.path.join(Config.PERIOD_DIR, filename)
+        # Single-day reports also depend on the 30 days before them, so they are always rebuilt
+        if not force and start_date_str != end_date_str:
+            report = _load_fresh_period_report(output_path, start_date_str, end_date_str)
+            if report is not None:
+                return report
+
+        all_files = _ensure_daily_rollups(start_date_str, end_date_str)
+
+        daily_data = _load_daily_files(all_files, warn_missing=True)
 
         # Even if no data, we should still return a valid report structure for single day reports
         # This helps with UI consistency, especially for "Today" view
@@ -282,53 +554,23 @@ def build_period_report(start_date_str, end_date_str, output_filename=None):
                     "topApps": []
                 }
                 
-                if output_filename:
-                    filename = output_filename
-                else:
-                    filename = f"traffic_period_{start_date_str}-{end_date_str}.json"
-
-                filepath = os.path.join(Config.PERIOD_DIR, filename)
-                with open(filepath, 'w') as f:
-                    json.dump(report, f, indent=2)
+                _write_report_json(output_path, report)
                     
                 return report
             else:
                 return None # Return None to indicate no data was found for multi-day reports
 
-        # Aggregate raw byte stats - new lean format only
-        total_dl_bytes = 0
-        total_ul_bytes = 0
-        total_traffic_bytes = 0
-        
-        for d in daily_data:
-            # New format only
-            total_dl_bytes += d.get('stats_bytes', {}).get('dl_bytes', 0)
-            total_ul_bytes += d.get('stats_bytes', {}).get('ul_bytes', 0)
-            total_traffic_bytes += d.get('stats_bytes', {}).get('total_bytes', 0)
-
-        # Aggregate devices from raw bytes
-        all_devices = {}
-        for d in daily_data:
-            for device in d.get('devices', []):
-                mac = device['mac']
-                if mac not in all_devices:
-                    all_devices[mac] = {"mac": mac, "name": device['name'], "dl_bytes": 0, "ul_bytes": 0, "total_bytes": 0, "daily_traffic": [], "topApps": {}}
-                
-                all_devices[mac]['dl_bytes'] += device.get('dl_bytes', 0)
-                all_devices[mac]['ul_bytes'] += device.get('ul_bytes', 0)
-                all_devices[mac]['total_bytes'] += device.get('total_bytes', 0)
-                all_devices[mac]['daily_traffic'].append({"date": d['barChart']['labels'][0], "total_bytes": device.get('total_bytes', 0)})
-                
-                # Aggregate individual device top apps for "Top 3 Apps (Period)" in Personalized Usage Summary
-                for app in device.get('topApps', []):
-                    app_name = rename_app(app['name'])  # Apply rename logic during aggregation
-                    all_devices[mac]['topApps'][app_name] = all_devices[mac]['topApps'].get(app_name, 0) + app.get('total_bytes', 0)
+        # A single day is already fully aggregated by its rollup; skip the aggregation below,
+        # unless a day in its 30-day window was written after it (backfill, restore)
+        if start_date_str == end_date_str and _rollup_newer_than_window(all_files[0], start_date_str):
+            report = _single_day_period_report(daily_data[0], start_date_str)
+            if report is not None:
+                _write_report_json(output_path, report)
+                return report
 
-        # Aggregate top apps from raw bytes
-        all_top_apps = {}
-        for d in daily_data:
-            for app in d.get('topApps', []):
-                all_top_apps[app['name']] = all_top_apps.get(app['name'], 0) + app.get('total_bytes', 0)
+        # Aggregate raw byte stats, devices, top apps and bar chart values in one pass
+        totals, all_devices, all_top_apps, bar_labels, bar_values = _aggregate_period(daily_data)
+        total_dl_bytes, total_ul_bytes, total_traffic_bytes = totals
 
         # --- Determine appropriate quota for this period ---
         quota_value, quota_type = get_appropriate_quota(start_date_str, end_date_str)
@@ -344,10 +586,10 @@ def build_period_report(start_date_str, end_date_str, output_filename=None):
                 return 999 if total_gb > Config.DEVICE_HIGH_USAGE_ALERT_GB else 0
             else:
                 # Multi-day statistical comparison
-                if len(device_data['daily_traffic']) <= 1 or device_data['total_bytes'] == 0:
+                if len(device_data['trend_bytes']) <= 1 or device_data['total_bytes'] == 0:
                     return 0
                     
-                most_recent = device_data['daily_traffic'][-1]['total_bytes']
+                most_recent = device_data['trend_bytes'][-1]
                 avg_daily = device_data['total_bytes'] / days_in_period
                 
                 if avg_daily == 0:
@@ -355,51 +597,64 @@ def build_period_report(start_date_str, end_date_str, output_filename=None):
                     
                 return ((most_recent - avg_daily) / avg_daily) * 100
 
+        # Single-day reports compare against the last 30 days; load those files once and
+        # fold them into per-device running totals, so each device below is one lookup
+        thirty_file_count = 0
+        device_30_lookup = {}  # {mac: [total_bytes, peak_date, peak_bytes]}
+        if len(daily_data) == 1:
+            thirty_days_ago = (datetime.strptime(start_date_str, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
+            thirty_files = [os.path.join(Config.DAILY_DIR, f"{d}.json") for d in get_date_range(thirty_days_ago, end_date_str)]
+            thirty_daily_data = _load_daily_files(thirty_files)
+            thirty_file_count = len(thirty_daily_data)
+            for d in thirty_daily_data:
+                date_label = d['barChart']['labels'][0]
+                for dev in d.get('devices', []):
+                    day_bytes = dev.get('total_bytes', 0)
+                    acc = device_30_lookup.get(dev['mac'])
+                    if acc is None:
+                        device_30_lookup[dev['mac']] = [day_bytes, date_label, day_bytes]
+                    else:
+                        acc[0] += day_bytes
+                        if day_bytes > acc[2]:
+                            acc[1] = date_label
+                            acc[2] = day_bytes
+
         final_devices = []
         for mac, data in all_devices.items():
             if data['total_bytes'] < 5368709: # Filter insignificant devices
                 continue
 
-            peak_day = max(data['daily_traffic'], key=lambda x: x['total_bytes']) if data['daily_traffic'] else {"date": "N/A", "total_bytes": 0}
+            # Per-day dates/totals are kept as parallel lists; only the totals go into the report
+            daily_dates = data.pop('daily_dates')
+            daily_totals = data.pop('daily_totals')
+            if daily_totals:
+                peak_index = max(range(len(daily_totals)), key=daily_totals.__getitem__)
+                peak_day = {"date": daily_dates[peak_index], "total_bytes": daily_totals[peak_index]}
+            else:
+                peak_day = {"date": "N/A", "total_bytes": 0}
             
             # Calculate percentage using byte values directly
             data['percentage'] = (data['total_bytes'] / total_traffic_bytes * 100) if total_traffic_bytes > 0 else 0
             # Keep pre-calculated metrics in GB for convenience
             data['avg_daily_gb'] = bytes_to_gb(data['total_bytes']) / len(daily_data) if daily_data else 0
             data['peak_day'] = {"date": peak_day['date'], "gb": bytes_to_gb(peak_day.get('total_bytes', 0))}
-            data['trend_bytes'] = [day['total_bytes'] for day in data['daily_traffic']]
+            data['trend_bytes'] = daily_totals
             # Calculate anomaly detection percentage for device card alerts
             data['recent_vs_avg_percent'] = calculate_anomaly_percent(data, len(daily_data))
 
             # For single-day reports, override with 30-day aggregates for better context
             if len(daily_data) == 1:
-                thirty_days_ago = (datetime.strptime(start_date_str, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
-                thirty_files = [os.path.join(Config.DAILY_DIR, f"{d}.json") for d in get_date_range(thirty_days_ago, end_date_str)]
-                thirty_daily_data = []
-                for f in thirty_files:
-                    if os.path.exists(f) and os.path.getsize(f) > 0:
-                        with open(f, 'r') as fp:
-                            thirty_daily_data.append(json.load(fp))
-                if thirty_daily_data:
-                    device_30_total = 0
-                    device_30_daily = []
-                    for d in thirty_daily_data:
-                        for dev in d.get('devices', []):
-                            if dev['mac'] == mac:
-                                device_30_total += dev.get('total_bytes', 0)
-                                device_30_daily.append({"date": d['barChart']['labels'][0], "total_bytes": dev.get('total_bytes', 0)})
-                    if device_30_total > 0 and len(thirty_daily_data) >= 7:  # Require at least 7 days for reliability
-                        data['avg_daily_gb'] = bytes_to_gb(device_30_total) / len(thirty_daily_data)
-                        peak_30 = max(device_30_daily, key=lambda x: x['total_bytes']) if device_30_daily else {"date": "N/A", "total_bytes": 0}
-                        data['peak_day'] = {"date": peak_30['date'], "gb": bytes_to_gb(peak_30.get('total_bytes', 0))}
-                    # If <7 days, keep original single-day values
+                device_30_data = device_30_lookup.get(mac)
+                if device_30_data and device_30_data[0] > 0 and thirty_file_count >= 7:  # Require at least 7 days for reliability
+                    device_30_total, peak_date, peak_bytes = device_30_data
+                    data['avg_daily_gb'] = bytes_to_gb(device_30_total) / thirty_file_count
+                    data['peak_day'] = {"date": peak_date, "gb": bytes_to_gb(peak_bytes)}
+                # If <7 days, keep original single-day values
             
-            top_apps_list = sorted([{"name": k, "total_bytes": v} for k, v in data['topApps'].items()], key=lambda x: x['total_bytes'], reverse=True)
-            data['topApps'] = [{"name": a['name'], "total_bytes": a['total_bytes']} for a in top_apps_list[:5]]
+            data['topApps'] = [{"name": k, "total_bytes": v} for k, v in heapq.nlargest(5, data['topApps'].items(), key=itemgetter(1))]
             
             final_devices.append(data)
 
-        final_top_apps = sorted([{"name": k, "total_bytes": v} for k, v in all_top_apps.items()], key=lambda x: x['total_bytes'], reverse=True)
 
         report = {
             "stats_bytes": {
@@ -412,24 +667,18 @@ def build_period_report(start_date_str, end_date_str, output_filename=None):
             },
             "devices": sorted(final_devices, key=lambda x: x['total_bytes'], reverse=True),
             "barChart": {
-                "labels": [d['barChart']['labels'][0] for d in daily_data],
-                "values_bytes": [d['barChart'].get('values_bytes', [0])[0] for d in daily_data],
+                "labels": bar_labels,
+                "values_bytes": bar_values,
                 "title": f"Daily Traffic ({start_date_str} to {end_date_str})",
                 # --- FIX: Carry over hourly data for single-day reports ---
                 "hourly_values_bytes": daily_data[0]['barChart'].get('hourly_values_bytes') if len(daily_data) == 1 else None,
                 "hourly_labels": daily_data[0]['barChart'].get('hourly_labels') if len(daily_data) == 1 else None
             },
-            "topApps": [{"name": a['name'], "total_bytes": a['total_bytes']} for a in final_top_apps[:10]]
+            # nlargest keeps sorted()'s tie order, so only the top 10 get ordered
+            "topApps": [{"name": k, "total_bytes": v} for k, v in heapq.nlargest(10, all_top_apps.items(), key=itemgetter(1))]
         }
         
-        if output_filename:
-            filename = output_filename
-        else:
-            filename = f"traffic_period_{start_date_str}-{end_date_str}.json"
-
-        filepath = os.path.join(Config.PERIOD_DIR, filename)
-        with open(filepath, 'w') as f:
-            json.dump(report, f, indent=2)
+        _write_report_json(output_path, report)
             
         return report
 
@@ -446,15 +695,10 @@ def get_device_apps(mac, start_date, end_date):
         # For single-day reports, directly load the daily JSON file instead of building a full period report
         if start_date == end_date:
             daily_file_path = os.path.join(Config.DAILY_DIR, f"{start_date}.json")
-            if os.path.exists(daily_file_path):
-                with open(daily_file_path, 'r') as f:
-                    daily_data = json.load(f)
-                
-                # Find the specific device in the daily data
-                for device in daily_data.get('devices', []):
-                    if device['mac'] == mac:
-                        return {"apps": device.get('topApps', [])}
-                return {"apps": []}
+            # Find the specific device in the daily data
+            result = _device_apps_from_file(daily_file_path, mac)
+            if result is not None:
+                return result
             else:
                 # If daily file doesn't exist, create it first
                 create_daily_rollup(start_date)
@@ -466,29 +710,19 @@ def get_device_apps(mac, start_date, end_date):
         today = datetime.now().strftime('%Y-%m-%d')
         if start_date == start_of_current_month and end_date == today:
             current_month_file_path = os.path.join(Config.PERIOD_DIR, "traffic_period_current_month.json")
-            if os.path.exists(current_month_file_path):
-                with open(current_month_file_path, 'r') as f:
-                    current_month_data = json.load(f)
-                
-                # Find the specific device in the monthly data
-                for device in current_month_data.get('devices', []):
-                    if device['mac'] == mac:
-                        return {"apps": device.get('topApps', [])}
-                return {"apps": []}
+            # Find the specific device in the monthly data
+            result = _device_apps_from_file(current_month_file_path, mac)
+            if result is not None:
+                return result
         
         # For last 7 days date range, check if we can use traffic_period_last-7-days.json
         seven_days_ago = (datetime.now() - timedelta(days=6)).strftime('%Y-%m-%d')
         if start_date == seven_days_ago and end_date == today:
             last_7_days_file_path = os.path.join(Config.PERIOD_DIR, "traffic_period_last-7-days.json")
-            if os.path.exists(last_7_days_file_path):
-                with open(last_7_days_file_path, 'r') as f:
-                    last_7_days_data = json.load(f)
-                
-                # Find the specific device in the last 7 days data
-                for device in last_7_days_data.get('devices', []):
-                    if device['mac'] == mac:
-                        return {"apps": device.get('topApps', [])}
-                return {"apps": []}
+            # Find the specific device in the last 7 days data
+            result = _device_apps_from_file(last_7_days_file_path, mac)
+            if result is not None:
+                return result
         
         # For completed monthly date ranges, check if we can use traffic_month_YYYY-MM.json
         try:
@@ -503,15 +737,10 @@ def get_device_apps(mac, start_date, end_date):
                 if start_date.endswith('-01') and end_date == last_day_of_month:
                     month_file_name = f"traffic_month_{end_date[:7]}.json"
                     month_file_path = os.path.join(Config.PERIOD_DIR, month_file_name)
-                    if os.path.exists(month_file_path):
-                        with open(month_file_path, 'r') as f:
-                            month_data = json.load(f)
-
-                        # Find the specific device in the monthly data
-                        for device in month_data.get('devices', []):
-                            if device['mac'] == mac:
-                                return {"apps": device.get('topApps', [])}
-                        return {"apps": []}
+                    # Find the specific device in the monthly data
+                    result = _device_apps_from_file(month_file_path, mac)
+                    if result is not None:
+                        return result
             
             # For multi-month ranges, aggregate apps from existing monthly files
             # This is much faster than calling build_period_report for long periods
@@ -536,23 +765,20 @@ def get_device_apps(mac, start_date, end_date):
                     for month_id in months_in_range:
                         month_file_name = f"traffic_month_{month_id}.json"
                         month_file_path = os.path.join(Config.PERIOD_DIR, month_file_name)
-                        if os.path.exists(month_file_path):
+                        month_devices = _load_device_index(month_file_path)
+                        if month_devices is not None:
                             found_any_month = True
-                            with open(month_file_path, 'r') as f:
-                                month_data = json.load(f)
-                            
                             # Find the device and aggregate its apps
-                            for device in month_data.get('devices', []):
-                                if device['mac'] == mac:
-                                    for app in device.get('topApps', []):
-                                        app_name = app.get('name', '')
-                                        app_bytes = app.get('total_bytes', 0)
-                                        aggregated_apps[app_name] = aggregated_apps.get(app_name, 0) + app_bytes
-                                    break
+                            device = month_devices.get(mac)
+                            if device is not None:
+                                for app in device.get('topApps', []):
+                                    app_name = app.get('name', '')
+                                    app_bytes = app.get('total_bytes', 0)
+                                    aggregated_apps[app_name] = aggregated_apps.get(app_name, 0) + app_bytes
                     
                     if found_any_month:
                         # Sort by total bytes descending and return top apps
-                        sorted_apps = sorted(aggregated_apps.items(), key=lambda x: x[1], reverse=True)[:15]
+                        sorted_apps = heapq.nlargest(15, aggregated_apps.items(), key=itemgetter(1))
                         return {"apps": [{"name": name, "total_bytes": total} for name, total in sorted_apps]}
         except ValueError:
             # If date parsing fails, continue with regular build_period_report approach
@@ -569,49 +795,46 @@ def get_device_apps(mac, start_date, end_date):
         print(f"Error getting device apps for {mac}: {e}")
         return {"apps": []}
 
-def create_monthly_reports():
+# Daily rollup file names; group 1 is the YYYY-MM month prefix
+_DAILY_FILE_RE = re.compile(r'^(\d{4}-\d{2})-\d{2}\.json$')
+
+def create_monthly_reports(force=False):
     """
     Generates an aggregated JSON report for each month that has data.
     This replaces monthly_aggregator.sh.
+    With force set, every month is rebuilt, e.g. after the report format changed.
     """
     print("Generating monthly reports...")
-    daily_files = [f for f in os.listdir(Config.DAILY_DIR) if f.endswith('.json')]
-    
-    if not daily_files:
+    # One scandir pass: DirEntry.stat() is served from the directory read where the
+    # platform allows, and files are sized and matched in the same loop
+    found_daily_files = False
+    monthly_prefixes = set()
+    with os.scandir(Config.DAILY_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith('.json'):
+                continue
+            found_daily_files = True
+            match = _DAILY_FILE_RE.match(entry.name)
+            if not match:
+                continue
+            try:
+                # Only process files larger than 500 bytes (likely to have real data)
+                if entry.stat().st_size > 500:
+                    monthly_prefixes.add(match.group(1))
+            except OSError:
+                continue  # Skip files we can't access
+
+    if not found_daily_files:
         print("No daily data found. Skipping monthly aggregation.")
         return
 
-    # Filter out daily files that have no real data (empty or minimal files)
-    meaningful_daily_files = []
-    for daily_file in daily_files:
-        filepath = os.path.join(Config.DAILY_DIR, daily_file)
-        try:
-            # Check if file has meaningful content
-            if os.path.getsize(filepath) > 500:  # Only process files larger than 500 bytes (likely to have real data)
-                meaningful_daily_files.append(daily_file)
-        except OSError:
-            continue  # Skip files we can't access
-    
-    if not meaningful_daily_files:
+    if not monthly_prefixes:
         print("No meaningful daily data found. Skipping monthly aggregation.")
         return
 
-    # Extract YYYY-MM prefixes from valid daily filenames only
-    monthly_prefixes = []
-    for f in meaningful_daily_files:
-        match = re.match(r'^(\d{4})-(\d{2})-\d{2}\.json$', f)
-        if match:
-            monthly_prefixes.append(match.group(1) + '-' + match.group(2))
-    monthly_prefixes = sorted(list(set(monthly_prefixes)))
-    
-    # Filter out months that don't have sufficient data
-    valid_monthly_prefixes = []
-    for month_prefix in monthly_prefixes:
-        # Count how many days in this month actually have data
-        days_with_data = [f for f in meaningful_daily_files if f.startswith(month_prefix)]
-        if len(days_with_data) >= 1:  # Only process months with at least 1 day of real data
-            valid_monthly_prefixes.append(month_prefix)
-    
+    # Every prefix above comes from at least 1 day of real data
+    valid_monthly_prefixes = sorted(monthly_prefixes)
+
     if not valid_monthly_prefixes:
         print("No months with sufficient data found. Skipping monthly aggregation.")
         return
@@ -622,6 +845,7 @@ def create_monthly_reports():
     today = datetime.now()
     current_month_prefix = today.strftime('%Y-%m')
     
+    month_jobs = []
     for month_prefix in valid_monthly_prefixes:
         try:
             parts = month_prefix.split('-')
@@ -647,18 +871,45 @@ def create_monthly_reports():
             output_path = os.path.join(Config.PERIOD_DIR, output_filename)
             
             # Smart skip logic
-            if month_prefix != current_month_prefix and os.path.exists(output_path):
+            if not force and month_prefix != current_month_prefix and os.path.exists(output_path):
                 # Past month with existing file — skip (already complete)
                 print(f"Month {month_prefix}: up-to-date — skipping.")
                 continue
             
-            print(f"Processing month: {month_prefix}")
-            build_period_report(start_date, end_date, output_filename=output_filename)
+            month_jobs.append((month_prefix, start_date, end_date, output_filename, force))
         except (ValueError, IndexError) as e:
             print(f"Skipping invalid month_prefix '{month_prefix}': {e}")
             continue
+
+    # Missing daily rollups are created first, oldest month first and in this
+    # process: each rollup reads the 30 days before it (which may belong to the
+    # previous month) and needs the database. What is left per month is pure
+    # JSON parsing and aggregation, which is independent across months.
+    for month_prefix, start_date, end_date, output_filename, _ in month_jobs:
+        _ensure_daily_rollups(start_date, end_date)
+
+    workers = min(Config.MAX_WORKER_PROCESSES, os.cpu_count() or 1, len(month_jobs))
+    done = 0
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for _ in executor.map(_build_month_report, month_jobs):
+                    done += 1
+        except (NotImplementedError, OSError, BrokenProcessPool) as e:
+            # No working semaphores (no /dev/shm) or a worker was killed, e.g. by
+            # the OOM killer: build whatever is left in this process instead
+            print(f"WARNING: Worker processes failed ({e}). Building remaining months serially.")
+    for job in month_jobs[done:]:
+        _build_month_report(job)
     print("Monthly reports generated.")
 
+def _build_month_report(job):
+    month_prefix, start_date, end_date, output_filename, force = job
+    print(f"Processing month: {month_prefix}", flush=True)
+    build_period_report(start_date, end_date, output_filename=output_filename, force=force)
+
 def run_traffic_monitor():
     """Generates the standard set of reports for the UI."""
     # First check database health and attempt self-healing if needed
@@ -707,10 +958,15 @@ def run_traffic_monitor():
     # - Existing users: regenerate only when yesterday's complete day is missing (data-driven)
     all_time_file = os.path.join(Config.PERIOD_DIR, "traffic_period_all-time.json")
     should_generate_all_time = False
-    if not os.path.exists(all_time_file):
+    # One stat() per file gives existence, size and mtime together
+    try:
+        all_time_st = os.stat(all_time_file)
+    except FileNotFoundError:
+        all_time_st = None
+    if all_time_st is None:
         print("'All-Time' report does not exist — generating for first time.")
         should_generate_all_time = True
-    elif os.path.getsize(all_time_file) < 100:
+    elif all_time_st.st_size < 100:
         print("'All-Time' report is empty or corrupt — regenerating.")
         should_generate_all_time = True
     else:
@@ -718,12 +974,13 @@ def run_traffic_monitor():
         # This ensures we update when yesterday's complete data is available
         yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
         yesterday_file = os.path.join(Config.DAILY_DIR, f"{yesterday}.json")
-        if os.path.exists(yesterday_file):
-            if os.path.getmtime(all_time_file) < os.path.getmtime(yesterday_file):
-                print(f"'All-Time' report is older than yesterday's complete data ({yesterday}) — refreshing.")
-                should_generate_all_time = True
-            else:
-                print(f"'All-Time' report is up-to-date — skipping.")
+        try:
+            yesterday_mtime = os.stat(yesterday_file).st_mtime
+        except FileNotFoundError:
+            yesterday_mtime = None
+        if yesterday_mtime is not None and all_time_st.st_mtime < yesterday_mtime:
+            print(f"'All-Time' report is older than yesterday's complete data ({yesterday}) — refreshing.")
+            should_generate_all_time = True
         else:
             print(f"'All-Time' report is up-to-date — skipping.")
 
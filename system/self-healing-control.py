@@ -4,12 +4,21 @@ Self-Healing Control Script for Superman-Tacking v2.1
 """
 
 import os
+import re
 import sys
-import glob
+import atexit
+import importlib.util
+import logging
 import gzip
 import sqlite3
+import shutil
+import struct
 import subprocess
-from datetime import datetime
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 
 # ANSI color codes for emojis to ensure they appear colored
 RED = '\033[0;31m'
@@ -45,31 +54,75 @@ except ImportError:
     LOGS_DIR = os.path.join(BASE_DIR, 'logs')
     restore_db_from_backup = None
 
+# (mtime_ns, size) of database.py -> flag value read from it
+_flag_cache = {}
+
+# Matches the flag's assignment at the start of a line, however it is spaced
+_FLAG_RE = re.compile(rb'^[ \t]*SELF_HEALING_ENABLED[ \t]*=[ \t]*(True|False)\b', re.M)
+
 def is_self_healing_enabled():
     """Check if self-healing is currently enabled."""
-    if not os.path.exists(DATABASE_PY_PATH):
+    try:
+        st = os.stat(DATABASE_PY_PATH)
+    except FileNotFoundError:
         return None
+    key = (st.st_mtime_ns, st.st_size)
+    if key in _flag_cache:
+        return _flag_cache[key]
 
-    with open(DATABASE_PY_PATH, 'r') as f:
-        content = f.read()
-        if 'SELF_HEALING_ENABLED = True' in content:
-            return True
-        elif 'SELF_HEALING_ENABLED = False' in content:
-            return False
-        else:
-            return None
+    with open(DATABASE_PY_PATH, 'rb') as f:
+        match = _FLAG_RE.search(f.read())
+    enabled = None if match is None else match.group(1) == b'True'
+    _flag_cache.clear()
+    _flag_cache[key] = enabled
+    return enabled
+
+# `cru l` forks a process; menu redraws within this many seconds reuse its answer
+CRU_CACHE_SECONDS = 5
+_cru_cache = {'checked_at': None, 'enabled': False}
 
 def is_auto_backup_enabled():
     """Check if auto backup cron job is currently enabled."""
+    checked_at = _cru_cache['checked_at']
+    if checked_at is not None and time.monotonic() - checked_at < CRU_CACHE_SECONDS:
+        return _cru_cache['enabled']
     try:
-        result = subprocess.run(['cru', 'l'], capture_output=True, text=True, check=True)
-        return 'skyhero_backup' in result.stdout
+        result = subprocess.run(['cru', 'l'], capture_output=True, check=True)
+        enabled = b'skyhero_backup' in result.stdout
     except FileNotFoundError:
         print("⚠️  cru command not available (this is normal on development systems)")
-        return False  # Assume disabled for development
+        enabled = False  # Assume disabled for development
     except Exception as e:
         print(f"Error checking cron status: {e}")
         return False
+    _cru_cache['checked_at'] = time.monotonic()
+    _cru_cache['enabled'] = enabled
+    return enabled
+
+# The flag's value is kept in a 5-byte slot ("True " / "False") so a toggle is a
+# single same-length overwrite rather than a rewrite of database.py
+_FLAG_LINE_RE = re.compile(rb'^[ \t]*SELF_HEALING_ENABLED = (True ?|False)', re.M)
+
+def _write_flag_in_place(enabled):
+    """
+    Overwrites the flag's value in database.py in place. Returns False if the
+    flag line isn't in the fixed-width form yet (e.g. "True" written by an
+    older version), in which case the caller rewrites the file.
+    """
+    slot = b'True ' if enabled else b'False'
+    with open(DATABASE_PY_PATH, 'r+b') as f:
+        match = _FLAG_LINE_RE.search(f.read())
+        if match is None or len(match.group(1)) != len(slot):
+            return False
+        os.pwrite(f.fileno(), slot, match.start(1))
+        os.fsync(f.fileno())
+    # The file size doesn't change, so a toggle within the same second as the
+    # last compile would leave a stale database.pyc behind: drop it
+    try:
+        os.remove(importlib.util.cache_from_source(DATABASE_PY_PATH))
+    except (OSError, NotImplementedError):
+        pass
+    return True
 
 def set_self_healing_state(enabled):
     """Enable or disable self-healing by modifying the flag."""
@@ -77,26 +130,30 @@ def set_self_healing_state(enabled):
         print("Error: database.py not found")
         return False
         
+    # Same-length writes within one mtime tick would otherwise look unchanged
+    _flag_cache.clear()
     try:
-        with open(DATABASE_PY_PATH, 'r') as f:
-            lines = f.readlines()
-        
-        modified = False
-        for i, line in enumerate(lines):
-            if 'SELF_HEALING_ENABLED = ' in line and not line.strip().startswith('#'):
-                if enabled:
-                    lines[i] = 'SELF_HEALING_ENABLED = True\n'
-                else:
-                    lines[i] = 'SELF_HEALING_ENABLED = False\n'
-                modified = True
-                break
-        
-        if not modified:
-            print("Error: Could not find SELF_HEALING_ENABLED flag")
-            return False
-        
-        with open(DATABASE_PY_PATH, 'w') as f:
-            f.writelines(lines)
+        if not _write_flag_in_place(enabled):
+            # Line-based fallback, which also converts the flag to the fixed-width form
+            with open(DATABASE_PY_PATH, 'r') as f:
+                lines = f.readlines()
+
+            modified = False
+            for i, line in enumerate(lines):
+                if 'SELF_HEALING_ENABLED = ' in line and not line.strip().startswith('#'):
+                    if enabled:
+                        lines[i] = 'SELF_HEALING_ENABLED = True \n'
+                    else:
+                        lines[i] = 'SELF_HEALING_ENABLED = False\n'
+                    modified = True
+                    break
+
+            if not modified:
+                print("Error: Could not find SELF_HEALING_ENABLED flag")
+                return False
+
+            with open(DATABASE_PY_PATH, 'w') as f:
+                f.writelines(lines)
         
         if enabled:
             print(f"{GREEN}✅{NC} Self-healing feature ENABLED")
@@ -118,59 +175,239 @@ def show_status():
     else:
         print(f"{YELLOW}❓{NC} Unable to determine status")
 
+_BYTE_UNITS = ('B', 'KB', 'MB', 'GB')
+_BYTE_SCALES = (1, 1024, 1048576, 1073741824)
+
 def format_bytes(bytes_value):
     """Format bytes into human readable format."""
-    if bytes_value >= 1073741824:  # >= 1GB
-        return f"{bytes_value / 1073741824:.1f} GB"
-    elif bytes_value >= 1048576:  # >= 1MB
-        return f"{bytes_value / 1048576:.1f} MB"
-    elif bytes_value >= 1024:  # >= 1KB
-        return f"{bytes_value / 1024:.1f} KB"
-    else:
+    # Each unit is 2**10 of the previous one, so the bit length picks it directly
+    unit = min((int(bytes_value).bit_length() - 1) // 10, 3) if bytes_value >= 1024 else 0
+    if unit == 0:
         return f"{bytes_value} B"
+    return f"{bytes_value / _BYTE_SCALES[unit]:.1f} {_BYTE_UNITS[unit]}"
 
-def check_db_integrity(db_path):
-    """Check database integrity using PRAGMA quick_check."""
+# MIN/MAX(timestamp) of one database file. ok is False when the range could
+# not be read; min_ts/max_ts are None for an empty table.
+DbRange = namedtuple('DbRange', 'ok min_ts max_ts')
+
+_FAILED_RANGE = DbRange(False, None, None)
+
+# (path, stat of path, stat of path-wal) -> result, so menu actions only re-open
+# a database that changed since it was last checked. quick_check reads every
+# page, so it is kept apart from the cheap range query and only run on request.
+_integrity_cache = {}
+_range_cache = {}
+
+def _stat_key(path):
     try:
-        if not os.path.exists(db_path):
-            return False, "MISSING"
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA quick_check;")
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result and result[0] == "ok":
-            return True, "Healthy"
-        else:
-            return False, "CORRUPTED"
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _change_key(db_path):
+    """Cache key that changes whenever db_path or its -wal changes; None if missing."""
+    db_key = _stat_key(db_path)
+    if db_key is None:
+        return None
+    return (db_path, db_key, _stat_key(db_path + '-wal'))
+
+# Probe connections map up to 64 MiB of the file and cap their page cache at
+# 16 MiB (a negative cache_size is in KiB, independent of the page size)
+PROBE_MMAP_SIZE = 64 * 1024 * 1024
+PROBE_CACHE_SIZE = -16384
+
+def _open_read_only(db_path, immutable=False):
+    # mode=ro never creates -wal/-shm files next to a backup or the live DB.
+    # immutable=1 additionally skips locking and change detection, which is only
+    # safe for files nothing writes to: backups and our own temp copies.
+    params = "mode=ro&immutable=1" if immutable else "mode=ro"
+    conn = sqlite3.connect(f"file:{quote(os.path.abspath(db_path))}?{params}", uri=True, check_same_thread=False)
+    # Read pages straight from the OS page cache instead of read()ing them into
+    # SQLite's own cache, so repeated probes of the same files stay off the disk
+    conn.execute(f"PRAGMA mmap_size={PROBE_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size={PROBE_CACHE_SIZE}")
+    return conn
+
+def _is_backup_file(db_path):
+    return os.path.dirname(os.path.abspath(db_path)) == os.path.abspath(DB_BACKUPS_DIR)
+
+# db_path -> ((st_dev, st_ino), connection). Read-only connections are kept open
+# across menu actions so the file isn't reopened and its schema re-parsed each
+# time; a file replaced by a restore gets a new inode and therefore a new connection.
+_conns = {}
+
+def _cached_connection(db_path, immutable=False):
+    st = os.stat(db_path)
+    file_id = (st.st_dev, st.st_ino)
+    entry = _conns.get(db_path)
+    if entry is not None:
+        if entry[0] == file_id:
+            return entry[1]
+        _drop_connection(db_path)
+    conn = _open_read_only(db_path, immutable)
+    _conns[db_path] = (file_id, conn)
+    return conn
+
+def _drop_connection(db_path):
+    entry = _conns.pop(db_path, None)
+    if entry is not None:
+        entry[1].close()
+
+@atexit.register
+def _close_connections():
+    for db_path in list(_conns):
+        _drop_connection(db_path)
+
+def _run_integrity_check(db_path):
+    """Runs PRAGMA quick_check on the cached read-only connection for db_path."""
+    try:
+        conn = _cached_connection(db_path, _is_backup_file(db_path))
+    except (sqlite3.Error, OSError):
+        return False, "CORRUPTED"
+    try:
+        # quick_check must see what is on disk now: an in-place corruption
+        # doesn't bump the change counter, so cached pages would hide it
+        conn.execute("PRAGMA shrink_memory")
+        # fetchall() runs the statement to completion, so the cached connection
+        # holds no read lock on the live DB between menu actions
+        result = conn.execute("PRAGMA quick_check;").fetchall()
     except sqlite3.DatabaseError:
+        # Don't keep a connection whose state an error may have left unusable
+        _drop_connection(db_path)
         return False, "CORRUPTED"
     except Exception:
+        _drop_connection(db_path)
         return False, "UNKNOWN"
+    if result and result[0][0] == "ok":
+        return True, "Healthy"
+    return False, "CORRUPTED"
+
+def _run_range_query(db_path, reuse_connection=True, immutable=False):
+    """
+    Reads MIN/MAX(timestamp) on a read-only connection, the cached one for
+    db_path unless reuse_connection is False (temp files).
+    """
+    try:
+        if reuse_connection:
+            conn = _cached_connection(db_path, immutable)
+        else:
+            conn = _open_read_only(db_path, immutable)
+    except (sqlite3.Error, OSError):
+        return _FAILED_RANGE
+    try:
+        # Two scalar subqueries, because SQLite only answers a lone MIN() or MAX()
+        # from the timestamp index; MIN(..), MAX(..) together scan the whole table
+        min_ts, max_ts = conn.execute(
+            "SELECT (SELECT MIN(timestamp) FROM traffic), (SELECT MAX(timestamp) FROM traffic)"
+        ).fetchall()[0]
+        return DbRange(True, min_ts, max_ts)
+    except Exception:
+        if reuse_connection:
+            _drop_connection(db_path)
+        return _FAILED_RANGE
+    finally:
+        if not reuse_connection:
+            conn.close()
+
+def check_db_integrity(db_path):
+    """Check database integrity using PRAGMA quick_check."""
+    key = _change_key(db_path)
+    if key is None:
+        return False, "MISSING"
+    result = _integrity_cache.get(key)
+    if result is None:
+        result = _integrity_cache[key] = _run_integrity_check(db_path)
+    return result
+
+def _db_range(db_path):
+    """Returns the cached DbRange for db_path, or None if the file is missing."""
+    key = _change_key(db_path)
+    if key is None:
+        return None
+    db_range = _range_cache.get(key)
+    if db_range is None:
+        db_range = _range_cache[key] = _run_range_query(db_path, immutable=_is_backup_file(db_path))
+    return db_range
 
 def get_db_date_range(db_path):
     """Get the date range of data in the database."""
+    db_range = _db_range(db_path)
+    if db_range is None:
+        return "N/A"
+    return _format_date_range(db_range)
+
+def _fmt_date(ts, fmt='%Y-%m-%d'):
+    """Formats a Unix timestamp as a local date string without building a datetime."""
+    return time.strftime(fmt, time.localtime(ts))
+
+def _format_date_range(db_range):
+    """Formats a DbRange as a date range string."""
+    if not db_range.ok:
+        return "Unknown"
     try:
-        if not os.path.exists(db_path):
-            return "N/A"
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM traffic")
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result and result[0] and result[1]:
-            min_date = datetime.fromtimestamp(result[0]).strftime('%Y-%m-%d')
-            max_date = datetime.fromtimestamp(result[1]).strftime('%Y-%m-%d')
+        if db_range.min_ts and db_range.max_ts:
+            if db_range.min_ts == db_range.max_ts:
+                return _fmt_date(db_range.min_ts)
+            min_date = _fmt_date(db_range.min_ts)
+            max_date = _fmt_date(db_range.max_ts)
             return f"{min_date} to {max_date}" if min_date != max_date else min_date
         else:
             return "Empty/Unknown"
     except Exception:
         return "Unknown"
 
+def _gzip_uncompressed_size(path):
+    """
+    Reads the uncompressed size from a gzip file's trailer (ISIZE, the size mod
+    2**32) instead of decompressing it. Raises ValueError for non-gzip files.
+    """
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\x1f\x8b':
+            raise ValueError(f"{path} is not a gzip file")
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack('<I', f.read(4))[0]
+
+# 64 KiB: a whole number of SQLite pages (4 KiB by default) and small enough to
+# stay cache-resident on the router while gzip fills it
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+
+# (path, mtime_ns, size) of a .db.gz backup -> its date range string
+_gzip_range_cache = {}
+
+def _gzip_db_date_range(path):
+    """Decompresses a .db.gz backup once into a temp file to read its date range."""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key in _gzip_range_cache:
+        return _gzip_range_cache[key]
+
+    temp_fd, temp_path = tempfile.mkstemp(suffix='.db')
+    try:
+        # Stream rather than holding the whole database in memory
+        with gzip.open(path, 'rb') as src, os.fdopen(temp_fd, 'wb') as dst:
+            shutil.copyfileobj(src, dst, DECOMPRESS_CHUNK_SIZE)
+        db_range = _run_range_query(temp_path, reuse_connection=False, immutable=True)
+    finally:
+        os.unlink(temp_path)
+    date_range = _format_date_range(db_range)
+    _gzip_range_cache[key] = date_range
+    return date_range
+
+def _prefetch_backup_ranges(backup_paths):
+    """
+    Reads the date ranges of the listed plain .db backups concurrently, so the
+    table renders from the cache. sqlite3 releases the GIL while it reads.
+    .db.gz backups are left to the render loop: each one is decompressed into
+    /tmp, which is RAM on the router, so they are handled one at a time.
+    """
+    db_paths = [path for path in backup_paths if not path.endswith('.db.gz')]
+    if len(db_paths) < 2:
+        return
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        # Consuming the results re-raises any worker error here, as the serial loop would
+        list(pool.map(_db_range, db_paths))
+
 def check_live_db_vs_backups():
     """Check live database status vs available backups."""
     # Check live DB status
@@ -201,29 +438,39 @@ def check_live_db_vs_backups():
         print("No backup directory found.")
         return
 
-    # Find both compressed and uncompressed backups
-    backup_files = glob.glob(os.path.join(DB_BACKUPS_DIR, "TrafficAnalyzer_*.db.gz"))
-    backup_files.extend(glob.glob(os.path.join(DB_BACKUPS_DIR, "TrafficAnalyzer_*.db")))
+    # Find both compressed and uncompressed backups in one directory pass,
+    # keeping each entry's stat result for sorting and sizes below
+    backup_files = []  # [(path, stat_result)]
+    with os.scandir(DB_BACKUPS_DIR) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith("TrafficAnalyzer_") and name.endswith((".db.gz", ".db")) and entry.is_file():
+                backup_files.append((entry.path, entry.stat()))
 
     # Also include traffic.db as a potential restore source (only if different from live DB)
     traffic_db_path = os.path.join(BASE_DIR, 'traffic.db')
-    if os.path.exists(traffic_db_path) and traffic_db_path != LIVE_DB_PATH:
-        backup_files.append(traffic_db_path)
+    if traffic_db_path != LIVE_DB_PATH:
+        try:
+            backup_files.append((traffic_db_path, os.stat(traffic_db_path)))
+        except FileNotFoundError:
+            pass
 
     if not backup_files:
         print("No backup files found.")
         return
 
     # Sort by modification time (newest first)
-    backup_files.sort(key=os.path.getmtime, reverse=True)
+    backup_files.sort(key=lambda item: item[1].st_mtime, reverse=True)
 
     # Store backup info for potential selection
     backup_info = []
 
-    # Show top 10 backups
-    for i, backup_path in enumerate(backup_files[:10], 1):
+    # Show top 10 backups, rendered into one string and written at once
+    _prefetch_backup_ranges([backup_path for backup_path, _ in backup_files[:10]])
+    parts = []
+    for i, (backup_path, backup_st) in enumerate(backup_files[:10], 1):
         filename = os.path.basename(backup_path)
-        file_size = os.path.getsize(backup_path)
+        file_size = backup_st.st_size
         file_size_formatted = format_bytes(file_size)
 
         is_compressed = filename.endswith('.db.gz')
@@ -235,21 +482,15 @@ def check_live_db_vs_backups():
             # Try to get uncompressed size
             uncompressed_size = 0
             try:
-                with gzip.open(backup_path, 'rb') as f:
-                    uncompressed_data = f.read()
-                    uncompressed_size = len(uncompressed_data)
-                    uncompressed_size_formatted = format_bytes(uncompressed_size)
+                uncompressed_size = _gzip_uncompressed_size(backup_path)
+                uncompressed_size_formatted = format_bytes(uncompressed_size)
             except Exception:
                 uncompressed_size_formatted = "Unknown"
 
             # Try to get date range from backup
             backup_date_range = "Unknown"
             try:
-                with gzip.open(backup_path, 'rb') as f:
-                    with open("/tmp/temp_db_check", "wb") as temp_f:
-                        temp_f.write(f.read())
-                    backup_date_range = get_db_date_range("/tmp/temp_db_check")
-                    os.remove("/tmp/temp_db_check")
+                backup_date_range = _gzip_db_date_range(backup_path)
             except Exception:
                 # Try to extract date from filename
                 try:
@@ -273,13 +514,11 @@ def check_live_db_vs_backups():
             backup_date_range = get_db_date_range(backup_path)
 
         status_symbol = f"{GREEN}🟢{NC}"
+        parts.append(f"{i}) {filename}  {status_symbol} {size_info}\n")
         if is_traffic_db:
-            print(f"{i}) {filename}  {status_symbol} {size_info}")
-            print(f"   Data: {backup_date_range} (current project DB)")
+            parts.append(f"   Data: {backup_date_range} (current project DB)\n\n")
         else:
-            print(f"{i}) {filename}  {status_symbol} {size_info}")
-            print(f"   Data: {backup_date_range}")
-        print()
+            parts.append(f"   Data: {backup_date_range}\n\n")
 
         # Store info for selection
         backup_info.append({
@@ -289,37 +528,42 @@ def check_live_db_vs_backups():
             'is_traffic_db': is_traffic_db
         })
 
+    sys.stdout.write(''.join(parts))
+    sys.stdout.flush()
     return backup_info
 
 
 def get_last_entry_timestamp(db_path):
     """Get the last entry timestamp from the database."""
+    return _last_entry_from_range(_db_range(db_path))
+
+def _last_entry_from_range(db_range):
+    """Returns (raw, readable) for a DbRange's MAX(timestamp); None is a missing file."""
+    if db_range is None:
+        return None, "N/A"
+    if not db_range.ok:
+        return None, "Error"
     try:
-        if not os.path.exists(db_path):
-            return None, "N/A"
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(timestamp) FROM traffic")
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result and result[0]:
-            return result[0], datetime.fromtimestamp(result[0]).strftime('%Y-%m-%d %H:%M:%S')
+        if db_range.max_ts:
+            return db_range.max_ts, _fmt_date(db_range.max_ts, '%Y-%m-%d %H:%M:%S')
         else:
             return None, "Empty"
     except Exception:
         return None, "Error"
 
 
-def get_last_entry_age(timestamp_raw):
-    """Calculate human-readable age from a Unix timestamp."""
+def get_last_entry_age(timestamp_raw, now=None):
+    """
+    Calculate human-readable age from a Unix timestamp.
+    now (seconds since epoch) lets callers share one clock reading between calls.
+    """
     if not timestamp_raw or timestamp_raw == "N/A" or timestamp_raw == "NULL":
         return "N/A"
     
     try:
         # Get current time (seconds since epoch)
-        now = int(datetime.now().timestamp())
+        if now is None:
+            now = int(time.time())
         
         # Calculate difference in seconds
         diff = now - int(timestamp_raw)
@@ -367,22 +611,25 @@ def quick_health_check():
     PROJECT_DB_PATH = os.path.join(BASE_DIR, 'traffic.db')
     
     print("\n--- Check Live DB vs Project DB ---")
+    now = int(time.time())
     
-    # Get live DB info
+    # Get live DB info; range and last entry both come from one range query
     live_exists = os.path.exists(LIVE_DB_PATH)
     live_healthy, live_status = check_db_integrity(LIVE_DB_PATH) if live_exists else (False, "MISSING")
+    live_range = _db_range(LIVE_DB_PATH) if live_exists else None
     live_size = format_bytes(os.path.getsize(LIVE_DB_PATH)) if live_exists else "N/A"
-    live_date_range = get_db_date_range(LIVE_DB_PATH) if live_exists else "N/A"
-    live_timestamp_raw, live_timestamp_readable = get_last_entry_timestamp(LIVE_DB_PATH) if live_exists else (None, "N/A")
-    live_age = get_last_entry_age(live_timestamp_raw) if live_exists else "N/A"
+    live_date_range = _format_date_range(live_range) if live_range else "N/A"
+    live_timestamp_raw, live_timestamp_readable = _last_entry_from_range(live_range)
+    live_age = get_last_entry_age(live_timestamp_raw, now) if live_exists else "N/A"
     
     # Get project DB info
     project_exists = os.path.exists(PROJECT_DB_PATH)
     project_healthy, project_status = check_db_integrity(PROJECT_DB_PATH) if project_exists else (False, "MISSING")
+    project_range = _db_range(PROJECT_DB_PATH) if project_exists else None
     project_size = format_bytes(os.path.getsize(PROJECT_DB_PATH)) if project_exists else "N/A"
-    project_date_range = get_db_date_range(PROJECT_DB_PATH) if project_exists else "N/A"
-    project_timestamp_raw, project_timestamp_readable = get_last_entry_timestamp(PROJECT_DB_PATH) if project_exists else (None, "N/A")
-    project_age = get_last_entry_age(project_timestamp_raw) if project_exists else "N/A"
+    project_date_range = _format_date_range(project_range) if project_range else "N/A"
+    project_timestamp_raw, project_timestamp_readable = _last_entry_from_range(project_range)
+    project_age = get_last_entry_age(project_timestamp_raw, now) if project_exists else "N/A"
     
     # Calculate time differences
     time_diff = 0
@@ -408,21 +655,23 @@ def quick_health_check():
     live_status_display = format_status(live_healthy, live_status, live_exists)
     project_status_display = format_status(project_healthy, project_status, project_exists)
     
-    # Print table
-    print(f"\nLive DB Path:      {LIVE_DB_PATH}")
-    print(f"Project DB Path:   {PROJECT_DB_PATH}")
-    
-    print()
-    # Table with proper alignment matching the shell script format
-    print("Feature               | Live Database            | Project Database")
-    print("----------------------|--------------------------|-------------------------")
-    print(f"{'Status':<21} | {live_status_display:<24} | {project_status_display:<24}")
-    print(f"{'Size':<21} | {live_size:<24} | {project_size:<24}")
-    print(f"{'Data Range':<21} | {live_date_range:<24} | {project_date_range:<24}")
-    print(f"{'Last Entry (Raw)':<21} | {str(live_timestamp_raw) if live_timestamp_raw else 'N/A':<24} | {str(project_timestamp_raw) if project_timestamp_raw else 'N/A':<24}")
-    print(f"{'Last Entry (Readable)':<21} | {live_timestamp_readable:<24} | {project_timestamp_readable:<24}")
-    print(f"{'Last Entry Age':<21} | {live_age:<24} | {project_age:<24}")
-    print("----------------------|--------------------------|-------------------------")
+    # Print table in a single write
+    sys.stdout.write(''.join([
+        f"\nLive DB Path:      {LIVE_DB_PATH}\n",
+        f"Project DB Path:   {PROJECT_DB_PATH}\n",
+        "\n",
+        # Table with proper alignment matching the shell script format
+        "Feature               | Live Database            | Project Database\n",
+        "----------------------|--------------------------|-------------------------\n",
+        f"{'Status':<21} | {live_status_display:<24} | {project_status_display:<24}\n",
+        f"{'Size':<21} | {live_size:<24} | {project_size:<24}\n",
+        f"{'Data Range':<21} | {live_date_range:<24} | {project_date_range:<24}\n",
+        f"{'Last Entry (Raw)':<21} | {str(live_timestamp_raw) if live_timestamp_raw else 'N/A':<24} | {str(project_timestamp_raw) if project_timestamp_raw else 'N/A':<24}\n",
+        f"{'Last Entry (Readable)':<21} | {live_timestamp_readable:<24} | {project_timestamp_readable:<24}\n",
+        f"{'Last Entry Age':<21} | {live_age:<24} | {project_age:<24}\n",
+        "----------------------|--------------------------|-------------------------\n",
+    ]))
+    sys.stdout.flush()
     
     # Diagnosis
     diagnosis = "Check Manually"
@@ -447,8 +696,8 @@ def quick_health_check():
     if time_diff_str != "N/A":
         print(f"Time Difference: {time_diff_str}")
     
-    # Get router time
-    router_time = subprocess.check_output(['date'], stderr=subprocess.STDOUT).decode().strip()
+    # Get router time, in BusyBox `date`'s default format without forking it
+    router_time = time.strftime("%a %b %e %H:%M:%S %Z %Y")
     print(f"Router Time: {YELLOW}{router_time}{NC}")
 
 def toggle_auto_backup():
@@ -463,10 +712,11 @@ def toggle_auto_backup():
     except Exception:
         pass  # cru is available
 
+    _cru_cache['checked_at'] = None  # The next menu draw must see whatever changes below
     try:
         # Check if cron job exists
-        result = subprocess.run(['cru', 'l'], capture_output=True, text=True, check=True)
-        exists = 'skyhero_backup' in result.stdout
+        result = subprocess.run(['cru', 'l'], capture_output=True, check=True)
+        exists = b'skyhero_backup' in result.stdout
 
         if exists:
             # Disable backup
@@ -612,4 +862,6 @@ def main():
                     pass  # Handle pipe/redirect cases gracefully
 
 if __name__ == '__main__':
+    # Show system.database progress messages on the console
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     main()
\ No newline at end of file
@@ -1,175 +1,237 @@
 import os
+import re
+import ctypes
+import hmac
+import hashlib
 import subprocess
-from datetime import datetime, timedelta
+import time
+import threading
+from datetime import date, datetime
 from functools import lru_cache
 
 def bytes_to_gb(b):
     """Converts bytes to gigabytes, rounded to 2 decimal places."""
     if b is None:
         return 0
-    return round(b / 1073741824, 2)
+    if type(b) is not int:
+        return round(b / 1073741824, 2)
+    # Whole hundredths of a GB in integer arithmetic, rounding half to even
+    # exactly as round() does, so the result matches the float path
+    hundredths, remainder = divmod(b * 100, 1073741824)
+    if remainder > 536870912 or (remainder == 536870912 and hundredths & 1):
+        hundredths += 1
+    return hundredths / 100
+
+# PBKDF2 work factor for dashboard passwords. Each login attempt pays this cost,
+# which is what makes offline brute-forcing of PASSWORD_FILE impractical.
+PASSWORD_HASH_ITERATIONS = 100000
+
+def hash_password(password):
+    """Hashes a password with salted PBKDF2-SHA256 for storage in PASSWORD_FILE."""
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PASSWORD_HASH_ITERATIONS)
+    return f"pbkdf2_sha256${PASSWORD_HASH_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+def verify_password(password, stored_hash):
+    """Checks a password against a stored hash.
+
+    Returns a (matches, needs_rehash) tuple. Legacy unsalted SHA-256 hex digests
+    written by older versions are still accepted so they can be upgraded to
+    PBKDF2 on the next successful login.
+    """
+    if stored_hash.startswith('pbkdf2_sha256$'):
+        try:
+            _, iterations, salt_hex, digest_hex = stored_hash.split('$')
+            iterations = int(iterations)
+            salt = bytes.fromhex(salt_hex)
+            expected = bytes.fromhex(digest_hex)
+        except ValueError:
+            return False, False
+        attempted = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+        matches = hmac.compare_digest(attempted, expected)
+        return matches, matches and iterations != PASSWORD_HASH_ITERATIONS
+
+    # Legacy format: bare SHA-256 hex digest, compared as raw 32-byte digests
+    try:
+        expected = bytes.fromhex(stored_hash)
+    except ValueError:
+        return False, False
+    matches = hmac.compare_digest(hashlib.sha256(password.encode()).digest(), expected)
+    return matches, matches
 
 def get_date_range(start_date_str, end_date_str):
     """Generates a list of date strings between two dates."""
-    start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-    end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-    delta = end_date - start_date
-    return [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(delta.days + 1)]
+    if start_date_str == end_date_str:
+        # Single-day range: nothing to step over, but still reject impossible
+        # dates like 2026-02-30 the same way strptime does for longer ranges
+        datetime.strptime(start_date_str, '%Y-%m-%d')
+        return [start_date_str]
+    # Dashboards ask for the same windows over and over; callers get their own list
+    return list(_date_range(start_date_str, end_date_str))
+
+@lru_cache(maxsize=64)
+def _date_range(start_date_str, end_date_str):
+    start_day = datetime.strptime(start_date_str, '%Y-%m-%d').toordinal()
+    end_day = datetime.strptime(end_date_str, '%Y-%m-%d').toordinal()
+    # Step over day ordinals; date.isoformat() is YYYY-MM-DD without strftime's parsing
+    fromordinal = date.fromordinal
+    return tuple([fromordinal(day).isoformat() for day in range(start_day, end_day + 1)])
+
+# Resolved once at import; falls back to a PATH lookup off the router
+NVRAM_CMD = next((path for path in ('/bin/nvram', '/usr/sbin/nvram') if os.path.exists(path)), 'nvram')
+
+# On the router, libnvram.so reads NVRAM in-process, which saves a fork+exec of
+# the nvram command per key. Elsewhere it isn't present and NVRAM_CMD is used.
+try:
+    _libnvram = ctypes.CDLL('libnvram.so')
+    _libnvram.nvram_get.argtypes = [ctypes.c_char_p]
+    _libnvram.nvram_get.restype = ctypes.c_char_p
+except (OSError, AttributeError):
+    _libnvram = None
+# libnvram maps NVRAM on first use; don't let two request threads race it
+_libnvram_lock = threading.Lock()
+
+# Keys the nvram command returned nothing for aren't asked for again until this
+# many seconds have passed. Firmwares that never set custom_clientlist would
+# otherwise pay a fork+exec for it on every name table rebuild.
+NVRAM_EMPTY_KEY_SECONDS = 600
+# key -> time.monotonic() until which the key is assumed to still be empty
+_empty_nvram_keys = {}
+
+def _nvram_get(key):
+    """
+    Returns an NVRAM value as undecoded bytes (b'' if unset), or None if NVRAM
+    can't be read. Callers decode only the fields they keep.
+    """
+    return _nvram_values((key,))[key]
+
+def _nvram_values(keys):
+    """
+    Returns {key: value} for several NVRAM keys, each as _nvram_get() would.
+    Without libnvram, two or more keys are read from a single 'nvram show'
+    dump rather than an 'nvram get' fork+exec per key.
+    """
+    if _libnvram is not None:
+        with _libnvram_lock:
+            values = {key: _libnvram.nvram_get(key.encode()) for key in keys}
+        return {key: value if value is not None else b'' for key, value in values.items()}
+
+    now = time.monotonic()
+    values = dict.fromkeys(keys)
+    wanted = [key for key in keys if _empty_nvram_keys.get(key, 0) <= now]
+    if not wanted:
+        return values
+    command = [NVRAM_CMD, 'get', wanted[0]] if len(wanted) == 1 else [NVRAM_CMD, 'show']
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=5)
+        output = result.stdout if result.returncode == 0 else None
+    except (subprocess.SubprocessError, OSError):
+        output = None
+    for key in wanted:
+        value = output
+        if output is not None and len(wanted) > 1:
+            # 'nvram show' prints one key=value line per variable
+            match = re.search(rb'^' + re.escape(key.encode()) + rb'=(.*)$', output, re.M)
+            value = match.group(1) if match else b''
+        if not (value and value.strip()):
+            _empty_nvram_keys[key] = now + NVRAM_EMPTY_KEY_SECONDS
+        values[key] = value
+    return values
+
+DHCP_LEASES_FILE = "/var/lib/misc/dnsmasq.leases"
+
+# NVRAM client lists are runs of '<'-prefixed, '>'-separated entries. These pull
+# out just the fields we need in one scan instead of splitting every entry:
+# custom_clientlist  <name>mac>ip>hostname>>>>  -> (name, mac)
+# dhcp_staticlist    <mac>ip>hostname>...       -> (mac, hostname)
+_CUSTOM_CLIENT_RE = re.compile(rb'<([^<>]*)>([^<>]*)>[^<>]*>')
+_DHCP_STATIC_RE = re.compile(rb'<([^<>]*)>[^<>]*>([^<>]*)')
+# dnsmasq.leases lines: expiry mac ip hostname client-id -> (mac, hostname)
+_DHCP_LEASE_RE = re.compile(r'^[ \t]*\S+[ \t]+(\S+)[ \t]+\S+[ \t]+(\S+)', re.M)
 
 def get_all_device_names():
     """Fetches all device names from NVRAM and DHCP leases in one shot.
 
     Returns a dict mapping MAC (uppercase) -> device name.
-    Runs exactly 2 subprocess calls total, regardless of how many devices exist.
+    Reads 2 NVRAM keys in one go, regardless of how many devices exist.
     """
     name_map = {}
-
-    # Determine nvram command path once
-    nvram_cmd = "/bin/nvram"
-    if not os.path.exists(nvram_cmd):
-        nvram_cmd = "/usr/sbin/nvram"
+    nvram = _nvram_values(('custom_clientlist', 'dhcp_staticlist'))
 
     # Source 1: NVRAM custom_clientlist
-    try:
-        result = subprocess.run([nvram_cmd, 'get', 'custom_clientlist'],
-                               capture_output=True, text=True, timeout=5)
-        if result.returncode == 0 and result.stdout:
-            entries = result.stdout.strip().split('<')
-            for entry in entries:
-                if entry:
-                    parts = entry.split('>')
-                    if len(parts) >= 4:
-                        name = parts[0]
-                        entry_mac = parts[1].upper()
-                        if name and name != "*" and entry_mac not in name_map:
-                            name_map[entry_mac] = name
-    except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired, IOError, OSError):
-        pass
+    custom_list = nvram['custom_clientlist']
+    if custom_list:
+        for name, entry_mac in _CUSTOM_CLIENT_RE.findall(custom_list.strip()):
+            entry_mac = entry_mac.upper().decode(errors='replace')
+            if name and name != b"*" and entry_mac not in name_map:
+                name_map[entry_mac] = name.decode(errors='replace')
 
     # Source 2: NVRAM dhcp_staticlist (only fills gaps)
-    try:
-        result = subprocess.run([nvram_cmd, 'get', 'dhcp_staticlist'],
-                               capture_output=True, text=True, timeout=5)
-        if result.returncode == 0 and result.stdout:
-            entries = result.stdout.strip().split('<')
-            for entry in entries:
-                if entry:
-                    parts = entry.split('>')
-                    if len(parts) >= 3:
-                        entry_mac = parts[0].upper()
-                        hostname = parts[2]
-                        if hostname and hostname != "*" and entry_mac not in name_map:
-                            name_map[entry_mac] = hostname
-    except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired, IOError, OSError):
-        pass
+    static_list = nvram['dhcp_staticlist']
+    if static_list:
+        for entry_mac, hostname in _DHCP_STATIC_RE.findall(static_list.strip()):
+            entry_mac = entry_mac.upper().decode(errors='replace')
+            if hostname and hostname != b"*" and entry_mac not in name_map:
+                name_map[entry_mac] = hostname.decode(errors='replace')
 
     # Source 3: dnsmasq.leases (only fills remaining gaps)
-    dhcp_leases_file = "/var/lib/misc/dnsmasq.leases"
-    if os.path.exists(dhcp_leases_file):
-        try:
-            with open(dhcp_leases_file, 'r') as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) >= 4:
-                        entry_mac = parts[1].upper()
-                        hostname = parts[3]
-                        if hostname and hostname != "*" and entry_mac not in name_map:
-                            name_map[entry_mac] = hostname
-        except (IOError, OSError):
-            pass
+    try:
+        with open(DHCP_LEASES_FILE, 'r') as f:
+            leases = f.read()
+    except (IOError, OSError):
+        leases = ''
+    for entry_mac, hostname in _DHCP_LEASE_RE.findall(leases):
+        entry_mac = entry_mac.upper()
+        if hostname != "*" and entry_mac not in name_map:
+            name_map[entry_mac] = hostname
 
     return name_map
 
-@lru_cache(maxsize=64)
+# The name table is rebuilt after this many seconds, or as soon as the DHCP
+# leases file changes, so a device renamed on the router shows up without
+# restarting the dashboard
+DEVICE_NAME_CACHE_SECONDS = 60
+# (table, expires_at, leases mtime_ns). Replaced as a whole, so concurrent
+# requests always see a consistent entry and at worst rebuild it twice.
+_name_table = None
+
+def _device_name_table():
+    """Returns get_all_device_names(), rebuilt only when stale."""
+    global _name_table
+    now = time.monotonic()
+    try:
+        leases_mtime = os.stat(DHCP_LEASES_FILE).st_mtime_ns
+    except OSError:
+        leases_mtime = None
+    entry = _name_table
+    if entry is None or now >= entry[1] or entry[2] != leases_mtime:
+        entry = _name_table = (get_all_device_names(), now + DEVICE_NAME_CACHE_SECONDS, leases_mtime)
+    return entry[0]
+
 def get_device_name(mac):
     """Resolves a device name from its MAC address by checking router data sources.
 
-    Cached via @lru_cache so repeated calls for the same MAC are instant.
-    For bulk operations, prefer get_all_device_names() instead.
+    Looks the MAC up in a table of every known name, which is built with
+    get_all_device_names() and reused for DEVICE_NAME_CACHE_SECONDS, so
+    resolving many MACs costs the same two nvram calls as resolving one.
     """
-    try:
-        # Normalize MAC address to uppercase for comparison
-        search_mac = mac.upper()
-        
-        # Try to get the name from the router's NVRAM custom client list
-        # This is the primary source of custom device names set by the user
-        nvram_cmd = "/bin/nvram"
-        if not os.path.exists(nvram_cmd):
-            nvram_cmd = "/usr/sbin/nvram"
-            
-        result = subprocess.run([nvram_cmd, 'get', 'custom_clientlist'], 
-                               capture_output=True, text=True, timeout=5)
-        if result.returncode == 0 and result.stdout:
-            # Parse the custom client list format: <name>mac>ip>hostname>>>>> <name>mac>ip>hostname>>>>> ...
-            custom_list = result.stdout.strip()
-            if custom_list:
-                # Split by '<' to get individual entries
-                entries = custom_list.split('<')
-                for entry in entries:
-                    if entry:
-                        # Each entry format: name>mac>ip>hostname>>>>
-                        parts = entry.split('>')
-                        if len(parts) >= 4:
-                            name = parts[0]
-                            entry_mac = parts[1]
-                            # Compare MAC addresses (case insensitive)
-                            if entry_mac.upper() == search_mac and name and name != "*":
-                                return name
-        
-        # Try to get the name from the router's NVRAM dhcp_staticlist
-        # This contains static DHCP reservations
-        result = subprocess.run([nvram_cmd, 'get', 'dhcp_staticlist'], 
-                               capture_output=True, text=True, timeout=5)
-        if result.returncode == 0 and result.stdout:
-            # Parse the dhcp_staticlist format: mac>ip>hostname>lease_time>>>>>
-            dhcp_static_list = result.stdout.strip()
-            if dhcp_static_list:
-                # Split by '<' to get individual entries
-                entries = dhcp_static_list.split('<')
-                for entry in entries:
-                    if entry:
-                        # Each entry format: mac>ip>hostname>lease_time>>>>>
-                        parts = entry.split('>')
-                        if len(parts) >= 3:
-                            entry_mac = parts[0]
-                            hostname = parts[2]
-                            # Compare MAC addresses (case insensitive)
-                            if entry_mac.upper() == search_mac and hostname and hostname != "*":
-                                return hostname
-        
-        # Try to get the name from the router's DHCP leases file
-        # This contains dynamic DHCP assignments
-        dhcp_leases_file = "/var/lib/misc/dnsmasq.leases"
-        if os.path.exists(dhcp_leases_file):
-            with open(dhcp_leases_file, 'r') as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) >= 4:
-                        # parts[1] is MAC, parts[3] is hostname
-                        if parts[1].upper() == search_mac and parts[3] and parts[3] != "*":
-                            return parts[3]
-        
-    except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired, IOError, OSError):
-        # If any step fails, continue to the next method
-        pass
-    except Exception:
-        # Catch any other unexpected exceptions
-        pass
-    
+    name = _device_name_table().get(mac.upper())
+    if name:
+        return name
+    return _unknown_device_name(mac)
+
+_STRIP_COLONS = str.maketrans('', '', ':')
+
+@lru_cache(maxsize=512)
+def _unknown_device_name(mac):
     # If we can't find a real name, return a generic name with the MAC suffix
     # This ensures we don't show fake names for real router data
-    mac_suffix = mac[-5:].replace(':', '')
-    return f"Device-{mac_suffix}"
+    return f"Device-{mac[-5:].translate(_STRIP_COLONS)}"
 
 def get_lan_ip():
     """Gets the router's LAN IP address from NVRAM."""
-    try:
-        # Command to get LAN IP from NVRAM, common on ASUS routers
-        result = subprocess.run(['nvram', 'get', 'lan_ipaddr'], capture_output=True, text=True, check=True)
-        lan_ip = result.stdout.strip()
-        if lan_ip:
-            return lan_ip
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        # If command fails, nvram might not be available or variable is not set
-        pass
+    # LAN IP lives in NVRAM on ASUS routers; None if NVRAM is unavailable or unset
+    lan_ip = _nvram_get('lan_ipaddr')
+    if lan_ip and lan_ip.strip():
+        return lan_ip.strip().decode(errors='replace')
     return None # Return None if not found
\ No newline at end of file
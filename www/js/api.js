@@ -75,9 +75,10 @@ async function fetchAndRenderDeviceApps(macAddress, currentDisplayStartDate, cur
  * Poll for a report file to be generated
  * @param {string} filename - Name of the file to poll for
  * @param {number} timeout - Timeout in milliseconds
+ * @param {string} [jobId] - Background job to wait for before fetching the file
  * @returns {Promise<Object>} Parsed JSON data
  */
-async function pollForReport(filename, timeout = 60000) {
+async function pollForReport(filename, timeout = 60000, jobId = null) {
     const pollInterval = 2000;
     const startTime = Date.now();
     return new Promise((resolve, reject) => {
@@ -88,6 +89,22 @@ async function pollForReport(filename, timeout = 60000) {
                 return;
             }
             try {
+                if (jobId) {
+                    // Wait for the queued build so a stale file from an earlier run isn't returned
+                    const statusResponse = await fetch(`/job_status/${jobId}`);
+                    if (statusResponse.ok) {
+                        const job = await statusResponse.json();
+                        if (job.status === 'failed') {
+                            clearInterval(intervalId);
+                            reject(new Error('Failed to generate report.'));
+                            return;
+                        }
+                        if (job.status !== 'done') {
+                            return;
+                        }
+                    }
+                    jobId = null;
+                }
                 const response = await fetch(`/data/period_data/${filename}`);
                 if (!response.ok) {
                     // If response is 404, do nothing and wait for the next poll
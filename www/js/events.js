@@ -596,7 +596,7 @@ async function handleBillingFilterClick() {
             throw new Error(cgiData.message || 'Failed to queue report.');
         }
 
-        const data = await pollForReport(filename);
+        const data = await pollForReport(filename, 60000, cgiData.job_id);
         document.getElementById('overview-title').textContent = `Period Overview: ${startDateStr} to ${endDateStr}`;
         updateMainStats(data.stats_bytes, 'custom', days);
         renderCharts(data.barChart, data.devices.slice(0, 10), data.topApps);